@@ -1,6 +1,53 @@
-from django.contrib import admin
-
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .bulk import chunked_update, replace_in_compatible_models, stream_csv, stream_json
 from .models import *
+from .search import search
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the table statistics instead of COUNT(*) for unfiltered changelists
+    of big tables (MySQL/PostgreSQL); filtered or small ones count exactly.
+    """
+
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not qs.query.where:
+            estimate = self._estimate(qs)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def _estimate(qs):
+        connection = connections[qs.db]
+        table = qs.model._meta.db_table
+        if connection.vendor == "mysql":
+            sql = "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        elif connection.vendor == "postgresql":
+            sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
 
 
 # Register your models here.
@@ -73,14 +120,179 @@ class CategoryAdmin(admin.ModelAdmin):
     ordering = ("order",)
 
 
+class ReassignForm(forms.Form):
+    brand = forms.ModelChoiceField(Brand.objects.order_by("name"), required=False, empty_label="— keep —")
+    category = forms.ModelChoiceField(Category.objects.order_by("name"), required=False, empty_label="— keep —")
+
+
+class FindReplaceForm(forms.Form):
+    find = forms.CharField(max_length=200, strip=False)
+    replace = forms.CharField(max_length=200, required=False, strip=False)
+
+
 @admin.register(UniversalCombo)
 class UniversalComboAdmin(admin.ModelAdmin):
     list_display = ("pk","main_model", "brand", "category", "active", "created_at")
     list_filter = ("brand", "category", "active")
-    search_fields = ("main_model", "compatible_models", "description")
+    list_select_related = ("brand", "category")
+    # Index-backed only: full-text words (see get_search_results), exact slug
+    search_fields = ("main_model", "compatible_models", "description", "=slug")
+    search_help_text = "Words from main/compatible models or description (e.g. \"redmi note 8\"), or an exact slug."
     prepopulated_fields = {"slug": ("main_model",)}
-    ordering = ("brand", "category", "main_model")
+    # Newest first walks the primary key; ordering by brand/category joins and sorts every row
+    ordering = ("-pk",)
     list_editable = ("active",)
+    autocomplete_fields = ("brand", "category")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # skip the extra unfiltered COUNT(*) when filtering
+
+    def get_search_results(self, request, queryset, search_term):
+        return search(queryset, search_term, rank=False, extra=Q(slug=search_term.strip())), False
+
+    actions = (
+        "activate",
+        "deactivate",
+        "reassign",
+        "find_replace",
+        "export_csv",
+        "export_json",
+    )
+
+    @admin.action(description="Activate selected combos", permissions=["change"])
+    def activate(self, request, queryset):
+        n = chunked_update(queryset, active=True)
+        self.message_user(request, f"✅ Activated {n} combos", messages.SUCCESS)
+
+    @admin.action(description="Deactivate selected combos", permissions=["change"])
+    def deactivate(self, request, queryset):
+        n = chunked_update(queryset, active=False)
+        self.message_user(request, f"✅ Deactivated {n} combos", messages.SUCCESS)
+
+    @admin.action(description="Move selected combos to another brand/category", permissions=["change"])
+    def reassign(self, request, queryset):
+        def apply(form):
+            values = {k: v for k, v in form.cleaned_data.items() if v is not None}
+            if not values:
+                return "Nothing to change"
+            return f"✅ Moved {chunked_update(queryset, **values)} combos"
+
+        return self._bulk_form(request, queryset, ReassignForm, "reassign", apply)
+
+    @admin.action(description="Find & replace in compatible models", permissions=["change"])
+    def find_replace(self, request, queryset):
+        def apply(form):
+            d = form.cleaned_data
+            n = replace_in_compatible_models(queryset, d["find"], d["replace"])
+            return f"✅ Replaced “{d['find']}” in {n} combos"
+
+        return self._bulk_form(request, queryset, FindReplaceForm, "find_replace", apply)
+
+    @admin.action(description="Export selected as CSV", permissions=["view"])
+    def export_csv(self, request, queryset):
+        return self._stream(stream_csv(queryset), "text/csv", "csv")
+
+    @admin.action(description="Export selected as JSON (uc_in_db format)", permissions=["view"])
+    def export_json(self, request, queryset):
+        return self._stream(stream_json(queryset), "application/json", "json")
+
+    def _bulk_form(self, request, queryset, form_class, action, apply):
+        """Intermediate page for actions that need input; posts back to the same action."""
+        if "apply" in request.POST:
+            form = form_class(request.POST)
+            if form.is_valid():
+                self.message_user(request, apply(form), messages.SUCCESS)
+                return None
+        else:
+            form = form_class()
+        return TemplateResponse(
+            request,
+            "admin/app/universalcombo/bulk_action.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": getattr(self, action).short_description,
+                "opts": self.model._meta,
+                "form": form,
+                "action": action,
+                "selected": request.POST.getlist(ACTION_CHECKBOX_NAME),
+                "select_across": request.POST.get("select_across", "0"),
+                "count": queryset.count(),
+            },
+        )
+
+    @staticmethod
+    def _stream(chunks, content_type, ext):
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        stamp = timezone.now().strftime("%Y%m%d-%H%M")
+        response["Content-Disposition"] = f'attachment; filename="universal-combos-{stamp}.{ext}"'
+        return response
+
+
+class ComboImportForm(forms.ModelForm):
+    class Meta:
+        model = ComboImport
+        fields = ("file",)
+
+    def clean_file(self):
+        f = self.cleaned_data["file"]
+        if not f.name.lower().endswith((".json", ".csv")):
+            raise ValidationError("Upload a .json (uc_in_db / JSON export) or .csv file.")
+        return f
+
+
+@admin.register(ComboImport)
+class ComboImportAdmin(admin.ModelAdmin):
+    """
+    Upload only stores the file and queues a job; `manage.py run_combo_imports`
+    does the import. The change page is a read-only progress view.
+    """
+
+    form = ComboImportForm
+    list_display = ("pk", "file", "status", "percent", "processed", "inserted", "error_count", "uploaded_by", "created_at")
+    list_filter = ("status",)
+    progress_fields = (
+        "status", "percent", "processed", "inserted", "error_count", "rows_per_second",
+        "uploaded_by", "created_at", "started_at", "finished_at",
+    )
+
+    def get_fields(self, request, obj=None):
+        return ("file",) + self.progress_fields + ("errors",) if obj else ("file",)
+
+    def get_readonly_fields(self, request, obj=None):
+        return self.get_fields(request, obj) if obj else ()
+
+    def has_change_permission(self, request, obj=None):
+        return False if obj else super().has_change_permission(request, obj)
+
+    def save_model(self, request, obj, form, change):
+        obj.uploaded_by = request.user
+        obj.size = obj.file.size
+        super().save_model(request, obj, form, change)
+
+    def response_add(self, request, obj, post_url_continue=None):
+        self.message_user(request, f"✅ Queued {obj.file.name}; rows appear as the import worker gets to them.", messages.SUCCESS)
+        return redirect("admin:app_comboimport_change", obj.pk)
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/progress/",
+                self.admin_site.admin_view(self.progress_view),
+                name="app_comboimport_progress",
+            ),
+        ] + super().get_urls()
+
+    def progress_view(self, request, pk):
+        if not self.has_view_permission(request):
+            return JsonResponse({"detail": "Forbidden"}, status=403)
+        job = get_object_or_404(ComboImport, pk=pk)
+        data = {name: getattr(job, name) for name in self.progress_fields[:6]}
+        data["errors"] = job.errors
+        return JsonResponse(data)
+
+    def render_change_form(self, request, context, add=False, change=False, form_url="", obj=None):
+        if obj:
+            context["progress_url"] = reverse("admin:app_comboimport_progress", args=[obj.pk])
+        return super().render_change_form(request, context, add, change, form_url, obj)
 
 
 @admin.register(FAQ)
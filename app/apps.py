@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app"
+
+    def ready(self):
+        import app.signals  # noqa
+        from django.conf import settings
+
+        from app import dbmetrics
+
+        dbmetrics.install()
+
+        if settings.TEMPLATE_TIMING in ("staff", "all"):
+            from app import profiling
+
+            profiling.install()
@@ -0,0 +1,340 @@
+"""
+Asset build helpers: prune CSS selectors the templates never use, extract
+per-page critical CSS, minify CSS and strip JS. Used by `manage.py build_assets`;
+pure string functions.
+"""
+import re
+from pathlib import Path
+
+CLASS_ATTR_RE = re.compile(r'class\s*=\s*"([^"]*)"|class\s*=\s*\'([^\']*)\'', re.S)
+ID_ATTR_RE = re.compile(r'id\s*=\s*"([^"]*)"', re.S)
+JS_STRING_RE = re.compile(r'"((?:[^"\\\n]|\\.)*)"|\'((?:[^\'\\\n]|\\.)*)\'|`((?:[^`\\]|\\.)*)`', re.S)
+TOKEN_RE = re.compile(r"-?[_a-zA-Z][\w-]*")
+NOT_RE = re.compile(r":not\((?:[^()]|\([^()]*\))*\)")
+SEL_CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+SEL_ID_RE = re.compile(r"#(-?[_a-zA-Z][\w-]*)")
+SEL_TAG_RE = re.compile(r"(?:^|[\s>+~,(])([a-zA-Z][\w-]*)")
+HTML_TAG_RE = re.compile(r"<([a-zA-Z][\w-]*)")
+TEMPLATE_TAG_RE = re.compile(r"\{\{.*?\}\}|\{%.*?%\}", re.S)
+DYNAMIC_PREFIX_RE = re.compile(r"([\w-]+)\{\{")
+
+# Added at runtime by Bootstrap/our JS or Django message tags
+SAFELIST = {
+    "show", "showing", "hiding", "fade", "collapsing", "collapse", "active",
+    "disabled", "modal-open", "modal-backdrop", "modal-static", "was-validated",
+    "is-valid", "is-invalid", "tooltip", "popover", "bs-tooltip-auto", "bs-popover-auto",
+    "highlight", "navbar-scroll", "dropdown-menu-end", "offcanvas-backdrop",
+}
+
+# Class names stored in the database, e.g. TeamRole.badge_class set in the admin
+SAFELIST_PREFIXES = {"badge-"}
+
+# At-rules whose children are rules we can prune; everything else is kept as-is
+NESTED_AT_RULES = ("@media", "@supports", "@container", "@layer")
+
+# Critical CSS only: states that need an interaction, and components that are
+# hidden until opened (their rules that hide them stay in)
+INTERACTION_RE = re.compile(r":(?:hover|focus|focus-visible|focus-within|active)\b")
+DEFERRED_PREFIXES = ("modal", "dropdown-menu", "dropdown-item", "dropdown-divider", "tooltip", "popover", "offcanvas", "toast")
+HIDES_RE = re.compile(r"display\s*:\s*none")
+FIRST_PAINT_SKIP = ("@media print", "@media (prefers-reduced-motion", "@keyframes", "@-webkit-keyframes")
+
+
+class UsedSelectors:
+    def __init__(self):
+        self.classes = set(SAFELIST)
+        self.ids = set()
+        self.prefixes = set(SAFELIST_PREFIXES)
+        self.id_prefixes = set()
+        self.tags = None  # None = keep every element selector
+        self.deferred = ()
+
+    def add_template(self, text):
+        for a, b in CLASS_ATTR_RE.findall(text):
+            self.add_class_tokens(a or b)
+        for value in ID_ATTR_RE.findall(text):
+            self.add_id(value)
+        if self.tags is not None:
+            self.tags.update(t.lower() for t in HTML_TAG_RE.findall(text))
+
+    def add_class_tokens(self, text):
+        # e.g. alert-{{ message.tags }} → keep everything starting with "alert-"
+        self.prefixes.update(p for p in DYNAMIC_PREFIX_RE.findall(text) if len(p) > 2)
+        self.classes.update(TOKEN_RE.findall(TEMPLATE_TAG_RE.sub(" ", text)))
+
+    def add_id(self, text):
+        self.id_prefixes.update(p for p in DYNAMIC_PREFIX_RE.findall(text) if len(p) > 2)
+        self.ids.update(TOKEN_RE.findall(TEMPLATE_TAG_RE.sub(" ", text)))
+
+    def has_class(self, name):
+        return name in self.classes or name.startswith(tuple(self.prefixes))
+
+    def has_id(self, name):
+        return name in self.ids or name.startswith(tuple(self.id_prefixes))
+
+
+def collect_used(template_dirs, source_files):
+    """
+    Class and id names referenced by templates, plus every string literal in
+    `source_files` (our JS, and forms.py for widget classes).
+    """
+    used = UsedSelectors()
+    for d in template_dirs:
+        for path in Path(d).rglob("*.html"):
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            used.add_template(text)
+            # inline <script> blocks too
+            for parts in JS_STRING_RE.findall(text):
+                for s in parts:
+                    used.classes.update(TOKEN_RE.findall(s))
+    for path in source_files:
+        text = Path(path).read_text(encoding="utf-8", errors="ignore")
+        for parts in JS_STRING_RE.findall(text):
+            for s in parts:
+                tokens = TOKEN_RE.findall(s)
+                used.classes.update(tokens)
+                used.ids.update(tokens)
+    return used
+
+
+def collect_critical(template_files):
+    """
+    Selectors for above-the-fold markup only: classes, ids and element names
+    from the given templates. Runtime JS classes, interaction states and
+    closed modals/menus are left to the full bundle.
+    """
+    used = UsedSelectors()
+    used.classes = set()
+    used.tags = {"html", "body"}
+    used.deferred = DEFERRED_PREFIXES
+    for path in template_files:
+        used.add_template(Path(path).read_text(encoding="utf-8", errors="ignore"))
+    return used
+
+
+# ---------- CSS ----------
+
+def _strip_comments(css):
+    out, i, n = [], 0, len(css)
+    while i < n:
+        c = css[i]
+        if c in "\"'":
+            j = _skip_string(css, i)
+            out.append(css[i:j])
+            i = j
+        elif css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def _skip_string(s, i):
+    quote, i = s[i], i + 1
+    while i < len(s) and s[i] != quote:
+        i += 2 if s[i] == "\\" else 1
+    return i + 1
+
+
+def _find(s, chars, i):
+    """Index of the first char in `chars` at i or later, skipping strings."""
+    while i < len(s):
+        if s[i] in "\"'":
+            i = _skip_string(s, i)
+            continue
+        if s[i] in chars:
+            return i
+        i += 1
+    return len(s)
+
+
+def _matching_brace(s, i):
+    depth = 0
+    while i < len(s):
+        if s[i] in "\"'":
+            i = _skip_string(s, i)
+            continue
+        if s[i] == "{":
+            depth += 1
+        elif s[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(s)
+
+
+def parse_css(css):
+    """Tiny CSS parser → list of (prelude, body) where body is a str or nested list."""
+    nodes, i = [], 0
+    while True:
+        j = _find(css, "{;}", i)
+        if j >= len(css):
+            return nodes
+        prelude = css[i:j].strip()
+        if css[j] in ";}":
+            if prelude:
+                nodes.append((prelude, None))  # @import / @charset statement
+            i = j + 1
+            continue
+        end = _matching_brace(css, j)
+        body = css[j + 1:end]
+        if prelude.startswith(NESTED_AT_RULES):
+            nodes.append((prelude, parse_css(body)))
+        else:
+            nodes.append((prelude, body))
+        i = end + 1
+
+
+def _split_selectors(prelude):
+    parts, depth, start = [], 0, 0
+    for k, c in enumerate(prelude):
+        if c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == "," and depth == 0:
+            parts.append(prelude[start:k])
+            start = k + 1
+    parts.append(prelude[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _selector_used(selector, used):
+    s = NOT_RE.sub("", selector)
+    s = re.sub(r"\[[^\]]*\]", "", s)  # attribute values may contain dots
+    if used.tags is not None:
+        if INTERACTION_RE.search(s):
+            return False
+        bare = re.sub(r"::?[\w-]+(?:\([^)]*\))?|[.#][\w-]+", " ", s)  # keep only type selectors
+        if not all(t.lower() in used.tags for t in SEL_TAG_RE.findall(bare)):
+            return False
+    return all(used.has_class(c) for c in SEL_CLASS_RE.findall(s)) and all(
+        used.has_id(i) for i in SEL_ID_RE.findall(s)
+    )
+
+
+def _deferred(selector, used):
+    return any(c.startswith(used.deferred) for c in SEL_CLASS_RE.findall(selector))
+
+
+def prune(nodes, used):
+    kept = []
+    for prelude, body in nodes:
+        if used.tags is not None and prelude.startswith(FIRST_PAINT_SKIP):
+            continue  # not needed for first paint
+        if isinstance(body, list):
+            children = prune(body, used)
+            if children:
+                kept.append((prelude, children))
+        elif body is None or prelude.startswith("@"):
+            kept.append((prelude, body))  # @font-face, @keyframes, statements
+        else:
+            selectors = [s for s in _split_selectors(prelude) if _selector_used(s, used)]
+            if used.deferred and not HIDES_RE.search(body):
+                selectors = [s for s in selectors if not _deferred(s, used)]
+            if selectors:
+                kept.append((", ".join(selectors), body))
+    return kept
+
+
+def _squeeze(text, tight):
+    """Collapse whitespace outside strings; drop it around chars in `tight`."""
+    out, i, n = [], 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            j = _skip_string(text, i)
+            out.append(text[i:j])
+            i = j
+        elif c.isspace():
+            while i < n and text[i].isspace():
+                i += 1
+            prev = out[-1][-1:] if out else ""
+            nxt = text[i:i + 1]
+            if prev and nxt and prev not in tight and nxt not in tight:
+                out.append(" ")
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def serialize(nodes, minify=True):
+    out = []
+    for prelude, body in nodes:
+        if not minify:
+            sel = prelude
+        elif prelude.startswith("@"):
+            sel = _squeeze(prelude, ",")  # "and (" must keep its space in media queries
+        else:
+            sel = _squeeze(prelude, ",>+~(")
+        if body is None:
+            out.append(sel + ";")
+        elif isinstance(body, list):
+            out.append(sel + "{" + serialize(body, minify) + "}")
+        else:
+            decls = _squeeze(body, ";:{},") if minify else body
+            out.append(sel + "{" + decls.rstrip(";") + "}")
+    return "".join(out) if minify else "\n".join(out)
+
+
+def build_css(sources, used):
+    return serialize(prune(parse_css(join_css(sources)), used))
+
+
+def join_css(sources):
+    return "\n".join(_strip_comments(s) for s in sources)
+
+
+# ---------- JS ----------
+
+def strip_js(js):
+    """
+    Drops comment-only lines and indentation; not a minifier. Statements are
+    never joined, so ASI and regex literals behave exactly as before.
+    """
+    out, in_template, in_block = [], False, False
+    for line in js.splitlines():
+        if in_template:
+            out.append(line)
+            in_template = _toggles_template(line, in_template)
+            continue
+        stripped = line.strip()
+        if in_block:
+            if "*/" in stripped:
+                in_block = False
+                stripped = stripped.split("*/", 1)[1].strip()
+            else:
+                continue
+        if not stripped or stripped.startswith("//"):
+            continue
+        if stripped.startswith("/*"):
+            if "*/" not in stripped:
+                in_block = True
+                continue
+            stripped = stripped.split("*/", 1)[1].strip()
+            if not stripped:
+                continue
+        out.append(stripped)
+        in_template = _toggles_template(stripped, False)
+    return "\n".join(out) + "\n"
+
+
+def _toggles_template(line, state):
+    """Track whether a line leaves us inside a multi-line template literal."""
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if c == "\\":
+            i += 2
+            continue
+        if not state and c in "\"'":
+            i = _skip_string(line, i)
+            continue
+        if c == "`":
+            state = not state
+        i += 1
+    return state
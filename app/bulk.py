@@ -0,0 +1,145 @@
+"""
+Bulk edits and streaming exports for UniversalCombo, used by the admin actions.
+
+Both walk the selection by primary key in fixed-size batches (keyset, not
+OFFSET), so 200k-row selections never sit in memory or in one transaction.
+"""
+import csv
+import json
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Replace
+from django.utils import timezone
+
+CHUNK_SIZE = 2000
+
+CSV_COLUMNS = (
+    "id",
+    "main_model",
+    "compatible_models",
+    "slug",
+    "brand_id",
+    "brand__name",
+    "category_id",
+    "category__name",
+    "description",
+    "active",
+    "created_at",
+    "updated_at",
+)
+
+
+def pk_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Lists of primary keys in the selection, ascending, chunk_size at a time."""
+    qs = queryset.order_by("pk").values_list("pk", flat=True)
+    last = None
+    while True:
+        page = qs.filter(pk__gt=last) if last is not None else qs
+        pks = list(page[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        last = pks[-1]
+
+
+def chunked_update(queryset, chunk_size=CHUNK_SIZE, **values):
+    """queryset.update(**values) as one short UPDATE per chunk; returns rows changed."""
+    model = queryset.model
+    values.setdefault("updated_at", timezone.now())  # update() skips auto_now
+    changed = 0
+    for pks in pk_chunks(queryset, chunk_size):
+        with transaction.atomic(using=queryset.db):
+            changed += model._default_manager.using(queryset.db).filter(pk__in=pks).update(**values)
+    return changed
+
+
+def replace_in_compatible_models(queryset, find, replace, chunk_size=CHUNK_SIZE):
+    """
+    Database-side REPLACE() on compatible_models for the rows that contain
+    `find`; returns how many rows that is.
+
+    LIKE ignores case on SQLite and MySQL's default collations while REPLACE()
+    doesn't, so each chunk's candidates are checked case-sensitively here and
+    only those rows are updated and counted.
+    """
+    model, db = queryset.model, queryset.db
+    values = {
+        "compatible_models": Replace("compatible_models", Value(find), Value(replace)),
+        "updated_at": timezone.now(),  # update() skips auto_now
+    }
+    changed = 0
+    for pks in pk_chunks(queryset.filter(compatible_models__contains=find), chunk_size):
+        with transaction.atomic(using=db):
+            rows = model._default_manager.using(db).filter(pk__in=pks)
+            matched = [pk for pk, text in rows.values_list("pk", "compatible_models") if find in text]
+            if matched:
+                changed += rows.filter(pk__in=matched).update(**values)
+    return changed
+
+
+def iter_rows(queryset, fields, chunk_size=CHUNK_SIZE):
+    """Tuples of `fields` for the selection, fetched one keyset batch at a time."""
+    qs = queryset.order_by("pk").values_list(*fields)
+    pk_index = fields.index("id")
+    last = None
+    while True:
+        page = qs.filter(pk__gt=last) if last is not None else qs
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][pk_index]
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in iter_rows(queryset, CSV_COLUMNS, chunk_size):
+        yield writer.writerow(row)
+
+
+def stream_json(queryset, chunk_size=CHUNK_SIZE):
+    """dumpdata-style list that `manage.py uc_in_db` can import again."""
+    fields = (
+        "id",
+        "main_model",
+        "compatible_models",
+        "slug",
+        "brand_id",
+        "category_id",
+        "description",
+        "created_at",
+        "updated_at",
+        "active",
+    )
+    yield "["
+    sep = "\n"
+    for pk, main_model, compatible, slug, brand, category, description, created, updated, active in iter_rows(
+        queryset, fields, chunk_size
+    ):
+        item = {
+            "model": "app.universalcombo",
+            "pk": pk,
+            "fields": {
+                "main_model": main_model,
+                "compatible_models": compatible,
+                "slug": slug,
+                "brand": brand,
+                "category": category,
+                "description": description,
+                "created_at": created.isoformat(),
+                "updated_at": updated.isoformat(),
+                "active": active,
+            },
+        }
+        yield sep + json.dumps(item, ensure_ascii=False)
+        sep = ",\n"
+    yield "\n]\n"
@@ -0,0 +1,113 @@
+"""
+Database connection reuse counters, for sizing CONN_MAX_AGE.
+
+    opened     new physical connections (TCP + auth + init_command)
+    reused     requests served by a connection kept from an earlier request
+    discarded  connections closed by Django: CONN_MAX_AGE reached (every
+               request when it is 0), errors, or a failed health check
+
+Counts are per alias and kept per process, then added to the shared cache
+every FLUSH_SECONDS so totals() covers all workers. Django's own
+request_started/request_finished receivers (close_old_connections) run
+before ours, so we see the state they leave behind; a connection kept at
+request_finished and closed at the next request_started counts as
+discarded then.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+CACHE_PREFIX = "db-conn:"
+CACHE_TTL = 60 * 60 * 24 * 7
+FLUSH_SECONDS = 30
+KINDS = ("opened", "reused", "discarded")
+
+_local = Counter()  # (alias, kind) → count not yet flushed
+_process = Counter()  # everything this process has seen
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _count(alias, kind):
+    with _lock:
+        _local[alias, kind] += 1
+        _process[alias, kind] += 1
+
+
+def _on_request_started(sender, **kwargs):
+    for conn in connections.all(initialized_only=True):
+        left = getattr(conn, "_metrics_left", None)
+        if left is not None and left is not conn.connection:
+            # kept at request_finished, closed now by close_old_connections
+            _count(conn.alias, "discarded")
+        conn._metrics_left = None
+        # the DB-API connection this request starts with, if one survived
+        conn._metrics_kept = conn.connection
+        conn._metrics_opened = False
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _count(connection.alias, "opened")
+    if getattr(connection, "_metrics_kept", None) is not None:
+        # the kept connection was replaced mid-request (failed health check or error)
+        _count(connection.alias, "discarded")
+        connection._metrics_kept = None
+    connection._metrics_opened = True
+
+
+def _on_request_finished(sender, **kwargs):
+    for conn in connections.all(initialized_only=True):
+        kept = getattr(conn, "_metrics_kept", None)
+        if kept is not None and kept is conn.connection:
+            _count(conn.alias, "reused")
+        if (kept is not None or getattr(conn, "_metrics_opened", False)) and conn.connection is None:
+            _count(conn.alias, "discarded")
+        conn._metrics_kept = None
+        conn._metrics_opened = False
+        conn._metrics_left = conn.connection
+    if time.monotonic() - _last_flush > FLUSH_SECONDS:
+        flush()
+
+
+def flush():
+    global _last_flush
+    with _lock:
+        pending = dict(_local)
+        _local.clear()
+        _last_flush = time.monotonic()
+    for (alias, kind), n in pending.items():
+        key = f"{CACHE_PREFIX}{alias}:{kind}"
+        cache.add(key, 0, CACHE_TTL)
+        try:
+            cache.incr(key, n)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(key, n, CACHE_TTL)
+
+
+def totals():
+    """{alias: {kind: n}} across all processes (as of their last flush) plus this one."""
+    flush()
+    aliases = list(connections)
+    keys = [f"{CACHE_PREFIX}{alias}:{kind}" for alias in aliases for kind in KINDS]
+    values = cache.get_many(keys)
+    return {alias: {kind: values.get(f"{CACHE_PREFIX}{alias}:{kind}", 0) for kind in KINDS} for alias in aliases}
+
+
+def process_totals():
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            **{alias: {kind: _process[alias, kind] for kind in KINDS} for alias in connections},
+        }
+
+
+def install():
+    request_started.connect(_on_request_started, dispatch_uid="dbmetrics-started")
+    request_finished.connect(_on_request_finished, dispatch_uid="dbmetrics-finished")
+    connection_created.connect(_on_connection_created, dispatch_uid="dbmetrics-created")
@@ -0,0 +1,259 @@
+"""
+Responsive image derivatives for uploaded media.
+
+Each original gets resized WebP + JPEG copies at fixed widths, stored under
+MEDIA_ROOT/derivatives/<sha256>/ so identical uploads share one set of files.
+Other sizes are rendered on demand through signed URLs (see get_resized).
+"""
+import contextlib
+import fcntl
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 960, 1280, 1920)
+FORMATS = (("webp", "WEBP"), ("jpg", "JPEG"))
+QUALITY = 80
+CACHE_TTL = 60 * 60
+DERIVATIVE_ROOT = "derivatives"
+
+# (app_label.Model, image field) pairs that get derivatives
+IMAGE_FIELDS = (
+    ("app.HeroSection", "bg_image"),
+    ("app.TeamMember", "photo"),
+    ("shop.Product", "image"),
+    ("shop.AboutImage", "image"),
+)
+
+
+def derivative_path(digest, width, ext):
+    return f"{DERIVATIVE_ROOT}/{digest[:2]}/{digest}/{width}w.{ext}"
+
+
+def _cache_key(name):
+    return "img-deriv:" + hashlib.md5(name.encode()).hexdigest()
+
+
+def render_variants(name):
+    """
+    Resize one stored original. Touches storage only (no DB), so the backfill
+    command can run it inside worker processes.
+    Returns (name, digest, widths, width, height).
+    """
+    from PIL import Image, ImageOps
+
+    with default_storage.open(name, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    with Image.open(io.BytesIO(raw)) as img:
+        img = ImageOps.exif_transpose(img)
+        width, height = img.size
+        widths = [w for w in WIDTHS if w < width] or [width]
+
+        for w in widths:
+            resized = None
+            for ext, fmt in FORMATS:
+                path = derivative_path(digest, w, ext)
+                if default_storage.exists(path):
+                    continue
+                if resized is None:
+                    resized = img.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+                out = flatten_for_jpeg(resized) if fmt == "JPEG" else resized
+                buf = io.BytesIO()
+                out.save(buf, fmt, quality=QUALITY, optimize=True)
+                default_storage.save(path, ContentFile(buf.getvalue()))
+    return name, digest, widths, width, height
+
+
+def flatten_for_jpeg(img):
+    """JPEG has no alpha: flatten transparent areas onto white."""
+    from PIL import Image
+
+    if img.mode in ("RGB", "L"):
+        return img
+    rgba = img.convert("RGBA")
+    out = Image.new("RGB", rgba.size, (255, 255, 255))
+    out.paste(rgba, mask=rgba.split()[-1])
+    return out
+
+
+def record_variants(name, digest, widths, width, height):
+    from .models import ImageDerivative
+
+    obj, _ = ImageDerivative.objects.update_or_create(
+        source=name,
+        defaults={"digest": digest, "widths": widths, "width": width, "height": height},
+    )
+    cache.delete(_cache_key(name))
+    return obj
+
+
+def build_variants(name):
+    """Generate and record derivatives for one file; never raises."""
+    try:
+        return record_variants(*render_variants(name))
+    except Exception:
+        logger.exception("Could not build image derivatives for %s", name)
+        return None
+
+
+def get_variants(name):
+    """Derivative info for a stored file name, or None if not built yet."""
+    if not name:
+        return None
+    key = _cache_key(name)
+    info = cache.get(key)
+    if info is None:
+        from .models import ImageDerivative
+
+        # from the primary: record_variants() clears this key right after
+        # writing, and a lagging replica would cache "not built" for an hour
+        row = (
+            ImageDerivative.objects.using(DEFAULT_DB_ALIAS)
+            .filter(source=name)
+            .values("digest", "widths", "width", "height")
+            .first()
+        )
+        info = row or {}
+        cache.set(key, info, CACHE_TTL)
+    return info or None
+
+
+def srcset(info, ext):
+    return ", ".join(f"{variant_url(info, w, ext)} {w}w" for w in info["widths"])
+
+
+def variant_url(info, width, ext):
+    return default_storage.url(derivative_path(info["digest"], width, ext))
+
+
+# ---------- On-demand resizing (signed URLs + bounded disk cache) ----------
+
+RESIZE_FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+RESIZE_MAX_WIDTH = 2560
+RESIZE_QUALITY_RANGE = (30, 95)
+# Striped: a variant key hashes to one of a fixed set of locks, so memory
+# stays flat however many variants are rendered
+_variant_locks = [threading.Lock() for _ in range(64)]
+_last_evict = 0.0
+
+
+def resize_signature(name, width, fmt, quality):
+    return salted_hmac("app.images.resize", f"{name}|{width}|{fmt}|{quality}").hexdigest()[:20]
+
+
+def resized_url(name, width, fmt="webp", quality=75):
+    sig = resize_signature(name, width, fmt, quality)
+    return reverse("app:resized-image", args=[sig, width, fmt, quality, name])
+
+
+def check_resize_request(sig, name, width, fmt, quality):
+    """Reject anything not minted by resized_url(), so arbitrary sizes can't be farmed."""
+    return (
+        fmt in RESIZE_FORMATS
+        and 0 < width <= RESIZE_MAX_WIDTH
+        and RESIZE_QUALITY_RANGE[0] <= quality <= RESIZE_QUALITY_RANGE[1]
+        and constant_time_compare(sig, resize_signature(name, width, fmt, quality))
+    )
+
+
+def _source_path(name):
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    path = os.path.realpath(os.path.join(root, name))
+    if not path.startswith(root + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _variant_lock(key):
+    return _variant_locks[int(key[:8], 16) % len(_variant_locks)]
+
+
+def get_resized(name, width, fmt, quality):
+    """
+    Path of the cached variant, rendering it on first request.
+    Concurrent requests for one variant are coalesced: a thread lock inside the
+    process and an flock across workers, so only one of them runs Pillow.
+    """
+    from PIL import Image, ImageOps
+
+    src = _source_path(name)
+    if not src:
+        return None
+
+    key = hashlib.sha256(f"{name}|{os.path.getmtime(src)}|{width}|{fmt}|{quality}".encode()).hexdigest()
+    cache_dir = os.path.join(settings.IMAGE_RESIZE_CACHE_DIR, key[:2])
+    out = os.path.join(cache_dir, f"{key}.{fmt}")
+    if os.path.exists(out):
+        os.utime(out)  # mtime doubles as "last used" for LRU eviction
+        return out
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with _variant_lock(key), open(out + ".lock", "w") as lockf:
+        fcntl.flock(lockf, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(out):
+                return out
+            with Image.open(src) as img:
+                img = ImageOps.exif_transpose(img)
+                w = min(width, img.width)
+                img = img.resize((w, max(1, round(img.height * w / img.width))), Image.LANCZOS)
+                pil_fmt = RESIZE_FORMATS[fmt][0]
+                if pil_fmt == "JPEG":
+                    img = flatten_for_jpeg(img)
+                tmp = f"{out}.{os.getpid()}.tmp"
+                img.save(tmp, pil_fmt, quality=quality, optimize=True)
+                os.replace(tmp, out)
+        finally:
+            fcntl.flock(lockf, fcntl.LOCK_UN)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(out + ".lock")
+
+    _maybe_evict()
+    return out
+
+
+def _maybe_evict(interval=60):
+    """Trim the cache back under IMAGE_RESIZE_CACHE_MAX_BYTES, least recently used first."""
+    global _last_evict
+    now = time.monotonic()
+    if now - _last_evict < interval:
+        return
+    _last_evict = now
+
+    files, total = [], 0
+    for dirpath, _, names in os.walk(settings.IMAGE_RESIZE_CACHE_DIR):
+        for n in names:
+            if n.endswith((".lock", ".tmp")):
+                continue
+            p = os.path.join(dirpath, n)
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+
+    limit = settings.IMAGE_RESIZE_CACHE_MAX_BYTES
+    if total <= limit:
+        return
+    for _, size, p in sorted(files):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(p)
+        total -= size
+        if total <= limit * 0.9:
+            break
@@ -0,0 +1,313 @@
+"""
+UniversalCombo file imports, shared by `manage.py uc_in_db` and the admin
+upload (ComboImport jobs run by `manage.py run_combo_imports`).
+
+Files are read incrementally and inserted BATCH_SIZE rows per transaction,
+so a file with hundreds of thousands of rows never sits in memory at once
+and a job's progress is committed together with the rows it describes.
+"""
+import codecs
+import csv
+import io
+import json
+import re
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.core.validators import slug_re
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from .models import Brand, Category, ComboImport, UniversalCombo
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 50  # messages kept on a job; the count covers the rest
+STALE_AFTER = timedelta(minutes=10)  # a running job with no progress this long lost its worker
+
+_JSON_SKIP_RE = re.compile(r"[\s,]*")
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+MAIN_MODEL_MAX = UniversalCombo._meta.get_field("main_model").max_length
+SLUG_MAX = UniversalCombo._meta.get_field("slug").max_length
+
+
+class RowError(ValueError):
+    pass
+
+
+def file_format(name):
+    return "csv" if name.lower().endswith(".csv") else "json"
+
+
+def iter_json(fh, chunk_size=1 << 16):
+    """(item, bytes read) for each element of a top-level JSON list, parsed a chunk at a time."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buf, pos, eof, started = "", 0, False, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        data = fh.read(chunk_size)
+        eof = not data
+        buf = buf[pos:] + utf8.decode(data, final=eof)
+        pos = 0
+
+    fill()
+    while True:
+        pos = _JSON_SKIP_RE.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Unexpected end of file: the JSON list is not closed")
+            fill()
+            continue
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON list of combos")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()  # the item continues in the next chunk
+            continue
+        if isinstance(item, dict) and "fields" in item:
+            item = item["fields"]  # dumpdata / admin export layout
+        yield item, fh.tell()
+
+
+def iter_csv(fh):
+    """(row, bytes read) per CSV row; accepts the admin export's column names too."""
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    try:
+        for row in csv.DictReader(text):
+            active = (row.get("active") or "").strip().lower()
+            yield {
+                "main_model": row.get("main_model"),
+                "compatible_models": row.get("compatible_models"),
+                "slug": row.get("slug"),
+                "brand": row.get("brand") or row.get("brand_id"),
+                "category": row.get("category") or row.get("category_id"),
+                "description": row.get("description") or "",
+                "created_at": row.get("created_at") or None,
+                "active": active in TRUE_VALUES if active else True,
+            }, fh.tell()
+    finally:
+        text.detach()  # leave closing fh to the caller
+
+
+def iter_records(fh, fmt):
+    return iter_csv(fh) if fmt == "csv" else iter_json(fh)
+
+
+class ComboImporter:
+    """Turns raw field dicts into unsaved UniversalCombos with unique slugs."""
+
+    def __init__(self):
+        self.brand_ids = set(Brand.objects.values_list("pk", flat=True))
+        self.category_ids = set(Category.objects.values_list("pk", flat=True))
+
+    def build(self, fields):
+        """
+        Validates the row as the database would, so one bad row becomes a
+        RowError instead of failing the whole batch's INSERT.
+        """
+        if not isinstance(fields, dict):
+            raise RowError("Not an object")
+        main_model = self._text(fields, "main_model").strip()
+        compatible_models = self._text(fields, "compatible_models")
+        if not main_model or not compatible_models.strip():
+            raise RowError("main_model and compatible_models are required")
+        if len(main_model) > MAIN_MODEL_MAX:
+            raise RowError(f"main_model is longer than {MAIN_MODEL_MAX} characters")
+        brand, category = self._id(fields, "brand"), self._id(fields, "category")
+        if brand not in self.brand_ids:
+            raise RowError(f"Skipping {main_model} → Brand {fields.get('brand')} not found")
+        if category not in self.category_ids:
+            raise RowError(f"Skipping {main_model} → Category {fields.get('category')} not found")
+        slug = self._text(fields, "slug").strip().lower()
+        if not slug:
+            slug = slugify(f"{main_model}-{brand}-{category}")[:SLUG_MAX].strip("-")
+        elif len(slug) > SLUG_MAX or not slug_re.fullmatch(slug):
+            raise RowError(f"Skipping {main_model} → invalid slug {slug!r}")
+        now = timezone.now()
+        return UniversalCombo(
+            main_model=main_model,
+            compatible_models=compatible_models,
+            slug=slug,
+            brand_id=brand,
+            category_id=category,
+            description=self._text(fields, "description"),
+            created_at=self._datetime(fields, "created_at") or now,
+            updated_at=self._datetime(fields, "updated_at") or now,
+            active=self._bool(fields.get("active", True)),
+        )
+
+    @staticmethod
+    def _id(fields, name):
+        try:
+            return int(fields.get(name))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _text(fields, name):
+        value = fields.get(name)
+        if value is None:
+            return ""
+        if isinstance(value, (dict, list)):
+            raise RowError(f"{name} must be text")
+        return str(value)
+
+    @staticmethod
+    def _datetime(fields, name):
+        value = fields.get(name)
+        if not value:
+            return None
+        try:
+            parsed = value if isinstance(value, datetime) else parse_datetime(str(value))
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise RowError(f"{name} {value!r} is not a date and time")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    @staticmethod
+    def _bool(value):
+        if isinstance(value, str):
+            return value.strip().lower() in TRUE_VALUES
+        return bool(value)
+
+    @staticmethod
+    def assign_slugs(objs, width=8):
+        """
+        Suffix -1, -2… onto slugs already taken in the table or earlier in the
+        batch, checking candidates with indexed IN lookups (re-importing a file
+        makes every slug collide).
+        """
+        taken = set(UniversalCombo.objects.filter(slug__in={o.slug for o in objs}).values_list("slug", flat=True))
+        seen, pending = set(), []
+        for obj in objs:
+            if obj.slug in taken or obj.slug in seen:
+                pending.append(obj)
+            else:
+                seen.add(obj.slug)
+        start = 1
+        while pending:
+            numbers = range(start, start + width)
+            candidates = {_suffixed(o.slug, n) for o in pending for n in numbers}
+            taken = set(UniversalCombo.objects.filter(slug__in=candidates).values_list("slug", flat=True))
+            left = []
+            for obj in pending:
+                for n in numbers:
+                    slug = _suffixed(obj.slug, n)
+                    if slug not in taken and slug not in seen:
+                        obj.slug = slug
+                        seen.add(slug)
+                        break
+                else:
+                    left.append(obj)
+            pending = left
+            start += width
+
+
+def _suffixed(slug, n):
+    suffix = f"-{n}"
+    return slug[: SLUG_MAX - len(suffix)] + suffix
+
+
+def import_file(fh, fmt, batch_size=BATCH_SIZE, progress=None):
+    """
+    Import every row of an open (binary) file. After each batch, inside its
+    transaction, calls progress(rows, inserted, errors, bytes_read).
+    Returns (rows, inserted).
+    """
+    importer = ComboImporter()
+    records = iter_records(fh, fmt)
+    rows = inserted = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return rows, inserted
+        objs, errors = [], []
+        for offset, (fields, _) in enumerate(batch, start=rows + 1):
+            try:
+                objs.append(importer.build(fields))
+            except RowError as e:
+                errors.append(f"Row {offset}: {e}")
+        with transaction.atomic():
+            if objs:
+                _insert(importer, objs)
+            rows += len(batch)
+            inserted += len(objs)
+            if progress:
+                progress(len(batch), len(objs), errors, batch[-1][1])
+
+
+def _insert(importer, objs, attempts=3):
+    """
+    INSERT the batch; if a slug was taken in the meantime (another import or
+    an admin edit), pick fresh slugs and try again, so every row counted as
+    inserted really was.
+    """
+    wanted = [obj.slug for obj in objs]
+    for attempt in range(attempts):
+        for obj, slug in zip(objs, wanted):
+            obj.slug = slug
+        importer.assign_slugs(objs)
+        try:
+            with transaction.atomic():  # savepoint: a failed attempt leaves the batch's transaction usable
+                UniversalCombo.objects.bulk_create(objs)
+            return
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+def claim_next_job():
+    """Mark the oldest queued job running and return it; None when the queue is empty."""
+    queued = ComboImport.objects.filter(status=ComboImport.QUEUED).order_by("created_at")
+    for pk in queued.values_list("pk", flat=True)[:10]:
+        # conditional UPDATE: only one worker can move a given job out of "queued"
+        if ComboImport.objects.filter(pk=pk, status=ComboImport.QUEUED).update(
+            status=ComboImport.RUNNING, started_at=timezone.now(), updated_at=timezone.now()
+        ):
+            return ComboImport.objects.get(pk=pk)
+    return None
+
+
+def fail_stale_jobs():
+    """Running jobs whose worker died; they can't resume mid-file, so they're marked failed."""
+    return ComboImport.objects.filter(
+        status=ComboImport.RUNNING, updated_at__lt=timezone.now() - STALE_AFTER
+    ).update(status=ComboImport.FAILED, finished_at=timezone.now())
+
+
+def run_job(job, batch_size=BATCH_SIZE):
+    def progress(rows, inserted, errors, position):
+        job.processed += rows
+        job.inserted += inserted
+        job.error_count += len(errors)
+        job.errors.extend(errors[: MAX_ERRORS - len(job.errors)])
+        job.position = position
+        job.save(update_fields=["processed", "inserted", "error_count", "errors", "position", "updated_at"])
+
+    try:
+        with job.file.open("rb") as fh:
+            import_file(fh, file_format(job.file.name), batch_size, progress)
+    except Exception as e:
+        job.status = ComboImport.FAILED
+        job.errors.append(f"Import stopped after row {job.processed}: {e}")
+    else:
+        job.status = ComboImport.DONE
+        job.position = job.size
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "errors", "position", "finished_at", "updated_at"])
+    return job
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+from app import dbmetrics
+
+
+class Command(BaseCommand):
+    help = "Compare per-request connections (CONN_MAX_AGE=0) with persistent ones over simulated request cycles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--max-age", type=int, default=60, help="CONN_MAX_AGE for the persistent run")
+
+    def handle(self, *args, **opts):
+        dbmetrics.install()  # idempotent; ready() has normally done it already
+        conn = connections[opts["database"]]
+        original = conn.settings_dict["CONN_MAX_AGE"]
+        connect_times = []
+
+        def timed_connect(connect):
+            def wrapper(*a, **kw):
+                start = time.perf_counter()
+                try:
+                    return connect(*a, **kw)
+                finally:
+                    connect_times.append(time.perf_counter() - start)
+
+            return wrapper
+
+        conn.connect = timed_connect(conn.connect)
+        try:
+            for label, max_age in (("per request (CONN_MAX_AGE=0)", 0), (f"persistent (CONN_MAX_AGE={opts['max_age']})", opts["max_age"])):
+                conn.close()
+                conn.settings_dict["CONN_MAX_AGE"] = max_age
+                connect_times.clear()
+                before = dbmetrics.process_totals()[conn.alias]
+                start = time.perf_counter()
+                for _ in range(opts["requests"]):
+                    request_started.send(sender=self.__class__)
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                        cursor.fetchone()
+                    request_finished.send(sender=self.__class__)
+                elapsed = time.perf_counter() - start
+                after = dbmetrics.process_totals()[conn.alias]
+                counts = ", ".join(f"{kind} {after[kind] - before[kind]}" for kind in dbmetrics.KINDS)
+                setup = f"{sum(connect_times) / len(connect_times) * 1000:.2f} ms per connect" if connect_times else "no connects"
+                self.stdout.write(
+                    self.style.MIGRATE_HEADING(f"{label}: {elapsed / opts['requests'] * 1000:.3f} ms/request")
+                )
+                self.stdout.write(f"  {counts}; {setup}\n")
+        finally:
+            del conn.connect
+            conn.settings_dict["CONN_MAX_AGE"] = original
+            conn.close()
+        self.stdout.write(self.style.SUCCESS(f"✅ {opts['requests']} requests per run on {conn.vendor} ({conn.alias})"))
@@ -0,0 +1,118 @@
+import asyncio
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class BadStatus(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server with slow clients (request trickled in, response read in small pieces) "
+        "and report throughput; pass one label=url per server to compare, e.g. WSGI vs ASGI"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("targets", nargs="+", help="label=http://host:port/path?query")
+        parser.add_argument("--clients", type=int, default=500, help="concurrent connections")
+        parser.add_argument("--duration", type=float, default=30.0, help="seconds per target")
+        parser.add_argument("--send-seconds", type=float, default=1.0, help="time each client takes to send its request")
+        parser.add_argument("--read-delay", type=float, default=0.05, help="pause between 1 KB reads of the response")
+        parser.add_argument("--timeout", type=float, default=30.0, help="give up on a request after this long")
+        parser.add_argument(
+            "--cookie", action="append", default=[], metavar="NAME=VALUE",
+            help="send this cookie, e.g. sessionid=... for the login-only search APIs (repeatable)",
+        )
+        parser.add_argument(
+            "--header", action="append", default=[], metavar="'NAME: VALUE'", help="extra request header (repeatable)"
+        )
+
+    def handle(self, *args, **opts):
+        targets = []
+        for target in opts["targets"]:
+            label, sep, url = target.partition("=")
+            if not sep or urlsplit(url).scheme != "http":
+                raise CommandError(f"Expected label=http://host:port/path, got {target!r}")
+            targets.append((label, url))
+        headers = []
+        for header in opts["header"]:
+            name, sep, value = header.partition(":")
+            if not sep or not name.strip() or "\n" in header or "\r" in header:
+                raise CommandError(f"Expected 'Name: value', got {header!r}")
+            headers.append(f"{name.strip()}: {value.strip()}")
+        if opts["cookie"]:
+            if any("=" not in c or "\n" in c or "\r" in c for c in opts["cookie"]):
+                raise CommandError("Expected --cookie name=value")
+            headers.append("Cookie: " + "; ".join(c.strip() for c in opts["cookie"]))
+        opts["extra_headers"] = "".join(f"{h}\r\n" for h in headers)
+
+        self.stdout.write(
+            f"{opts['clients']} clients, {opts['duration']:.0f}s each, request sent over {opts['send_seconds']}s, "
+            f"response read at 1 KB per {opts['read_delay'] * 1000:.0f} ms\n"
+        )
+        for label, url in targets:
+            latencies, errors = asyncio.run(self._run(url, opts))
+            done = len(latencies)
+            line = f"{label}: {done / opts['duration']:.1f} req/s, {done} ok, {sum(errors.values())} failed"
+            self.stdout.write(self.style.MIGRATE_HEADING(line))
+            if latencies:
+                cuts = statistics.quantiles(latencies, n=20) if done > 1 else latencies * 19
+                self.stdout.write(
+                    f"  latency p50 {statistics.median(latencies):.2f}s, p95 {cuts[18]:.2f}s, max {max(latencies):.2f}s\n"
+                )
+            if errors:
+                self.stdout.write("  " + ", ".join(f"{name} {n}" for name, n in errors.most_common()) + "\n")
+                if any(" 302 " in name for name in errors):
+                    self.stdout.write(self.style.WARNING("  redirected: the search APIs need a login, pass --cookie sessionid=...\n"))
+        self.stdout.write(self.style.SUCCESS("✅ Done"))
+
+    async def _run(self, url, opts):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: bench_slow_clients\r\n"
+            f"Accept: application/json\r\n{opts['extra_headers']}Connection: close\r\n\r\n"
+        ).encode()
+        host, port = parts.hostname, parts.port or 80
+        deadline = time.monotonic() + opts["duration"]
+        latencies, errors = [], Counter()
+
+        async def client():
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                try:
+                    await asyncio.wait_for(self._request(host, port, request, opts), opts["timeout"])
+                except Exception as e:
+                    errors[str(e) if isinstance(e, BadStatus) else type(e).__name__] += 1
+                    await asyncio.sleep(0.1)  # don't spin on a refused connection
+                    continue
+                if time.monotonic() <= deadline:
+                    latencies.append(time.monotonic() - start)
+
+        await asyncio.gather(*(client() for _ in range(opts["clients"])))
+        return latencies, errors
+
+    @staticmethod
+    async def _request(host, port, request, opts):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            pieces = 10
+            step = -(-len(request) // pieces)
+            for i in range(0, len(request), step):
+                writer.write(request[i : i + step])
+                await writer.drain()
+                await asyncio.sleep(opts["send_seconds"] / pieces)
+            status = await reader.readline()
+            if b" 200 " not in status:
+                raise BadStatus(status.decode(errors="replace").strip() or "empty response")
+            while await reader.read(1024):
+                await asyncio.sleep(opts["read_delay"])
+        finally:
+            writer.close()
@@ -0,0 +1,101 @@
+import hashlib
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.assets import collect_critical, collect_used, join_css, parse_css, prune, serialize, strip_js
+from app.templatetags.assets import MANIFEST_NAME, load_manifest
+
+DIST = "dist"
+
+# Same order as the <link>/<script> tags these bundles replace. A vendored
+# .min.js next to a JS source (e.g. Bootstrap's dist file) is used as-is;
+# otherwise the source only has comments and indentation stripped.
+CSS_SOURCES = ("css/style.css", "css/bootstrap.css")
+JS_SOURCES = ("js/bootstrap.bundle.js", "js/main.js")
+
+# Above-the-fold templates per url name; their CSS is inlined, the bundle loads async
+_TOP = ("master.html", "inc/_alert.html", "inc/_nav.html")
+_HERO = _TOP + ("app/base.html", "partials/section/hero.html")
+CRITICAL_PAGES = {
+    "app:home": _HERO,
+    "app:about": _HERO,
+    "app:contact": _HERO,
+    "app:faq": _HERO,
+    "app:privacy-policy": _HERO,
+    "app:terms-and-conditions": _HERO,
+    "shop:shop": _TOP + ("shop/base.html", "partials/section/hero.html"),
+    "app:combo-list": _TOP + (
+        "app/base.html",
+        "partials/section/combo-list.html",
+        "partials/components/combo-list-card.html",
+    ),
+    "app:cate-list": _TOP + (
+        "app/base.html",
+        "partials/section/category-list.html",
+        "partials/components/category-list-card.html",
+    ),
+}
+
+class Command(BaseCommand):
+    help = "Prune and minify CSS, join JS (upstream .min.js where vendored) into versioned bundles under static/dist/"
+
+    def handle(self, *args, **opts):
+        static_dir = Path(settings.BASE_DIR) / "static"
+        out_dir = static_dir / DIST
+        out_dir.mkdir(exist_ok=True)
+
+        template_dirs = [Path(d) for d in settings.TEMPLATES[0]["DIRS"]]
+        sources = [static_dir / p for p in JS_SOURCES]
+        sources += sorted(Path(settings.BASE_DIR).glob("*/forms.py"))
+        used = collect_used(template_dirs, sources)
+
+        css_in = [(static_dir / p).read_text(encoding="utf-8") for p in CSS_SOURCES]
+        js_in = [(static_dir / p).read_text(encoding="utf-8") for p in JS_SOURCES]
+        js_parts = []
+        for p in JS_SOURCES:
+            minified = static_dir / p.replace(".js", ".min.js")
+            if minified.exists():
+                js_parts.append(minified.read_text(encoding="utf-8"))
+            else:
+                js_parts.append(strip_js((static_dir / p).read_text(encoding="utf-8")))
+        rules = parse_css(join_css(css_in))
+        css = serialize(prune(rules, used))
+        js = ";\n".join(js_parts)
+
+        manifest = {
+            "css": self._write(out_dir, "app", "css", css),
+            "js": self._write(out_dir, "main", "js", js, minified=False),
+            "critical": {},
+        }
+        for page, templates in CRITICAL_PAGES.items():
+            files = [next(d / t for d in template_dirs if (d / t).exists()) for t in templates]
+            critical = serialize(prune(rules, collect_critical(files)))
+            # Pages sharing a layout share one file (same content hash)
+            manifest["critical"][page] = self._write(out_dir, "critical", "css", critical)
+        (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        load_manifest.cache_clear()
+
+        # Drop bundles from earlier builds
+        paths = [manifest["css"], manifest["js"], *manifest["critical"].values()]
+        keep = {Path(p).name for p in paths} | {MANIFEST_NAME}
+        for f in out_dir.iterdir():
+            if f.name not in keep:
+                f.unlink()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ CSS {self._kb(css_in)} → {len(css.encode()) // 1024} KB, "
+            f"JS {self._kb(js_in)} → {len(js.encode()) // 1024} KB ({manifest['css']}, {manifest['js']}), "
+            f"critical CSS for {len(CRITICAL_PAGES)} pages"
+        ))
+
+    @staticmethod
+    def _write(out_dir, name, ext, content, minified=True):
+        digest = hashlib.md5(content.encode()).hexdigest()[:8]
+        filename = f"{name}.{digest}.min.{ext}" if minified else f"{name}.{digest}.{ext}"
+        (out_dir / filename).write_text(content, encoding="utf-8")
+        return f"{DIST}/{filename}"
+
+    @staticmethod
+    def _kb(parts):
+        return sum(len(p.encode()) for p in parts) // 1024
@@ -0,0 +1,44 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+from app.images import IMAGE_FIELDS, record_variants, render_variants
+from app.models import ImageDerivative
+
+class Command(BaseCommand):
+    help = "Backfill responsive image derivatives for existing media"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+        parser.add_argument("--force", action="store_true", help="Rebuild files that already have derivatives")
+
+    def handle(self, *args, **opts):
+        names = set()
+        for label, field in IMAGE_FIELDS:
+            qs = apps.get_model(label).objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            names.update(qs.values_list(field, flat=True))
+
+        if not opts["force"]:
+            names -= set(ImageDerivative.objects.filter(source__in=names).values_list("source", flat=True))
+
+        if not names:
+            self.stdout.write(self.style.SUCCESS("✅ All images already have derivatives"))
+            return
+
+        # Workers only resize + write files; DB writes stay in this process.
+        # Close inherited DB connections so forked workers never share a socket.
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=opts["workers"]) as pool:
+            futures = {pool.submit(render_variants, name): name for name in sorted(names)}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    record_variants(*future.result())
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f"Skipping {name} → {e}"))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Built derivatives for {done} images ({failed} failed)"))
@@ -0,0 +1,45 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Value
+
+from app.models import Brand, Category, UniversalCombo
+from app.utils import combos_for
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN and time the UniversalCombo list queries (run before/after index migrations to compare)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--brand", help="Brand slug (default: the brand with most combos)")
+        parser.add_argument("--category", help="Category slug (default: the category with most combos)")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **opts):
+        brand = opts["brand"] or self._busiest(Brand)
+        category = opts["category"] or self._busiest(Category)
+        queries = [
+            (f"combo list, brand={brand}", combos_for("brand", Brand, brand or "").values("main_model", "compatible_models")),
+            (f"category list, category={category}", combos_for("category", Category, category or "").values("main_model", "compatible_models")),
+            ("default ordering, first 100", UniversalCombo.objects.values("pk")[:100]),
+            # Value(True): filter(active=True) compiles to a bare `WHERE active`,
+            # which isn't an equality the (active, updated_at) index can seek on
+            (
+                "recently updated active, first 50",
+                UniversalCombo.objects.filter(active=Value(True)).order_by("-updated_at").values("pk")[:50],
+            ),
+        ]
+        self.stdout.write(f"{UniversalCombo.objects.count()} combos\n")
+        for label, qs in queries:
+            timings = []
+            for _ in range(opts["repeat"]):
+                start = time.perf_counter()
+                rows = len(list(qs.all()))
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label}: {rows} rows, median {statistics.median(timings) * 1000:.1f} ms"))
+            self.stdout.write(qs.explain() + "\n")
+
+    @staticmethod
+    def _busiest(model):
+        return model.objects.annotate(n=Count("universal_combos")).order_by("-n").values_list("slug", flat=True).first()
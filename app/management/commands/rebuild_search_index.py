@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from app import search
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text search indexes (e.g. after a SQLite table rebuild dropped the FTS5 triggers)"
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor not in ("mysql", "sqlite"):
+            self.stdout.write(self.style.WARNING(f"No full-text index for {connection.vendor}; search uses icontains"))
+            return
+        for label, fields in search.SEARCH_FIELDS.items():
+            table = apps.get_model(label)._meta.db_table
+            create, drop = search.fulltext_sql(connection.vendor, table, fields)
+            with connection.cursor() as cursor:
+                for sql in drop:
+                    try:
+                        cursor.execute(sql)
+                    except DatabaseError:
+                        pass  # index wasn't there
+                for sql in create:
+                    cursor.execute(sql)
+            self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt search index for {label}"))
+        search._has_fts_table.cache_clear()
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from app.models import FAQ, PolicySection, TermsSection
+from app.richtext import render_rich_text
+
+# model → (source field, rendered field)
+TARGETS = (
+    (PolicySection, "content", "content_html"),
+    (TermsSection, "content", "content_html"),
+    (FAQ, "answer", "answer_html"),
+)
+
+class Command(BaseCommand):
+    help = "Re-render stored rich-text HTML (policy, terms, FAQ) from its source field"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        batch_size = opts["batch_size"]
+        for model, source, target in TARGETS:
+            changed = []
+            total = updated = 0
+            for obj in model.objects.only("pk", source, target).iterator(chunk_size=batch_size):
+                total += 1
+                html = render_rich_text(getattr(obj, source))
+                if html != getattr(obj, target):
+                    setattr(obj, target, html)
+                    changed.append(obj)
+                if len(changed) >= batch_size:
+                    model.objects.bulk_update(changed, [target])
+                    updated += len(changed)
+                    changed = []
+            if changed:
+                model.objects.bulk_update(changed, [target])
+                updated += len(changed)
+            self.stdout.write(self.style.SUCCESS(f"✅ {model.__name__}: {updated} of {total} rows re-rendered"))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.imports import BATCH_SIZE, claim_next_job, fail_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Process combo files uploaded in the admin (ComboImport jobs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty (for cron)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds between polls of an empty queue")
+
+    def handle(self, *args, **opts):
+        stale = fail_stale_jobs()
+        if stale:
+            self.stdout.write(self.style.WARNING(f"Marked {stale} abandoned imports as failed"))
+
+        while True:
+            close_old_connections()  # long-running process: drop connections the server timed out
+            job = claim_next_job()
+            if job is None:
+                if opts["once"]:
+                    return
+                time.sleep(opts["sleep"])
+                continue
+
+            self.stdout.write(f"Importing {job.file.name} (#{job.pk})")
+            job = run_job(job, opts["batch_size"])
+            style = self.style.SUCCESS if job.status == job.DONE else self.style.ERROR
+            icon = "✅" if job.status == job.DONE else "❌"
+            self.stdout.write(
+                style(
+                    f"{icon} #{job.pk} {job.status}: {job.inserted} inserted, "
+                    f"{job.error_count} skipped, {job.rows_per_second} rows/s"
+                )
+            )
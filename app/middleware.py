@@ -0,0 +1,388 @@
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from core import log, routers
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+EARLY_HINTS_TTL = 60 * 60
+
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/xml",
+    "application/json",
+    "application/xml",
+    "application/ld+json",
+)
+COMPRESS_MIN_BYTES = 1024  # below this the headers outweigh the savings
+MEMO_MIN_BYTES = 16 * 1024  # only big pages are worth a cache round-trip
+MEMO_TTL = 60 * 10
+BROTLI_QUALITY = 5  # dynamic responses: q5 is close to gzip speed, noticeably smaller
+HTB_RANDOM_BYTES = 100
+re_accepts = re.compile(r"\b(br|gzip)\b")
+
+REQUEST_ID_HEADER = "X-Request-ID"
+re_request_id = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+PROFILE_PARAM = "_profile"
+SERVER_TIMING_TOP = 3
+
+
+class RequestIdMiddleware:
+    """
+    Gives each request an id that core.log adds to every record logged
+    while handling it, and returns it as X-Request-ID. An id sent by the
+    proxy is kept so its access log lines up with ours.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.id = self._request_id(request)
+        token = log.begin(request.id)
+        try:
+            response = self.get_response(request)
+        finally:
+            log.end(token)
+        response[REQUEST_ID_HEADER] = request.id
+        return response
+
+    async def __acall__(self, request):
+        request.id = self._request_id(request)
+        token = log.begin(request.id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            log.end(token)
+        response[REQUEST_ID_HEADER] = request.id
+        return response
+
+    @staticmethod
+    def _request_id(request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        return incoming if re_request_id.fullmatch(incoming) else uuid.uuid4().hex
+
+
+def _hints_key(path):
+    return f"early-hints:{path}"
+
+
+class PreloadMiddleware:
+    """
+    Sends the preloads queued by {% preload %} as a `Link` header on HTML pages.
+
+    The links are also remembered per path, so the next request for that page
+    can get them as a 103 Early Hints response before the view even runs, on
+    servers that expose a `wsgi.early_hints` callable (e.g. gunicorn).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.preload_links = []
+        key = _hints_key(request.path)
+        cached = cache.get(key) if request.method == "GET" else None
+        if cached:
+            self._send_early_hints(request, cached)
+
+        response = self.get_response(request)
+
+        links = self._add_links(request, response)
+        if links and links != cached:  # most pages keep their links; skip the write
+            cache.set(key, links, EARLY_HINTS_TTL)
+        return response
+
+    async def __acall__(self, request):
+        request.preload_links = []  # no early hints under ASGI
+        response = await self.get_response(request)
+        links = self._add_links(request, response)
+        if links:
+            key = _hints_key(request.path)
+            if links != await cache.aget(key):
+                await cache.aset(key, links, EARLY_HINTS_TTL)
+        return response
+
+    @staticmethod
+    def _add_links(request, response):
+        """Adds the Link header; returns the links worth remembering for early hints."""
+        links = request.preload_links
+        if links and response.status_code == 200 and response.get("Content-Type", "").startswith("text/html"):
+            existing = response.get("Link")
+            response["Link"] = ", ".join(([existing] if existing else []) + links)
+            if request.method == "GET":
+                return links
+        return None
+
+    @staticmethod
+    def _send_early_hints(request, links):
+        send = request.META.get("wsgi.early_hints")
+        if not callable(send):
+            return
+        try:
+            send([("Link", link) for link in links])
+        except Exception:
+            logger.exception("Could not send early hints for %s", request.path)
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip for HTML and JSON responses.
+
+    Compressed bodies are memoized in the cache by content digest, so identical
+    pages (e.g. the same combo list hit repeatedly, or one served by cache_page)
+    are compressed once per encoding. Responses that rendered a CSRF token are
+    BREACH-sensitive: they are never memoized and only get gzip with Django's
+    random-length filename padding, on top of the per-response token masking.
+    Media files and already-encoded or streaming responses pass through.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if not self._compressible(request, response):
+            return response
+        # compression and the memo cache round-trip, off the event loop
+        return await sync_to_async(self._process)(request, response)
+
+    def _process(self, request, response):
+        if not self._compressible(request, response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = set(re_accepts.findall(request.META.get("HTTP_ACCEPT_ENCODING", "")))
+        has_token = self._has_csrf_token(response)
+        if "br" in accepted and brotli is not None and not has_token:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            return response
+
+        body = response.content
+        if has_token:
+            compressed = compress_string(body, max_random_bytes=HTB_RANDOM_BYTES)
+        else:
+            compressed = self._compress_memoized(body, encoding)
+        if len(compressed) >= len(body):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
+
+    @staticmethod
+    def _compressible(request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return False
+        if request.path.startswith((settings.MEDIA_URL, settings.STATIC_URL)):
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        return content_type in COMPRESSIBLE_TYPES and len(response.content) >= COMPRESS_MIN_BYTES
+
+    @staticmethod
+    def _has_csrf_token(response):
+        # get_token() always re-sends the cookie, so a rendered token shows up here
+        return settings.CSRF_COOKIE_NAME in response.cookies or b"csrfmiddlewaretoken" in response.content
+
+    @staticmethod
+    def _compress(body, encoding):
+        if encoding == "br":
+            return brotli.compress(body, quality=BROTLI_QUALITY)
+        return compress_string(body)
+
+    def _compress_memoized(self, body, encoding):
+        if len(body) < MEMO_MIN_BYTES:
+            return self._compress(body, encoding)
+        key = f"compressed:{encoding}:{hashlib.sha256(body).hexdigest()}"
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = self._compress(body, encoding)
+            cache.set(key, compressed, MEMO_TTL)
+        return compressed
+
+
+class TemplateTimingMiddleware:
+    """
+    Per-request template/SQL timing, enabled by settings.TEMPLATE_TIMING:
+      "all"   every request is timed, logged and gets a Server-Timing header
+      "staff" only staff requests with ?_profile=1
+    A staff request with ?_profile=1 also writes a collapsed-stack profile
+    (flame-graph input) to TEMPLATE_PROFILE_DIR.
+
+    Sync only: under ASGI Django runs it (and the rest of the request) in a
+    thread, which is fine for a diagnostic that is off by default.
+    """
+
+    def __init__(self, get_response):
+        if settings.TEMPLATE_TIMING not in ("staff", "all"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, "user", None)
+        dump = request.GET.get(PROFILE_PARAM) == "1" and user is not None and user.is_staff
+        if settings.TEMPLATE_TIMING != "all" and not dump:
+            return self.get_response(request)
+
+        from app import profiling
+
+        collector, token = profiling.start(root=request.path.replace(";", ":") or "/")
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(profiling.sql_wrapper(collector)))
+                response = self.get_response(request)
+        finally:
+            profiling.stop(token)
+        total = time.perf_counter() - start
+        collector.finish(total)
+
+        response["Server-Timing"] = self._server_timing(collector, total)
+        logger.info(
+            "timing %s %s total=%.1fms sql=%.1fms/%d templates=%.1fms top=%s",
+            request.method,
+            request.path,
+            total * 1000,
+            collector.sql_time * 1000,
+            collector.sql_count,
+            collector.render_time() * 1000,
+            "; ".join(f"{name} x{count} {self_t * 1000:.1f}ms" for name, count, _, self_t in collector.top(5)),
+        )
+        if dump:
+            response["X-Profile-File"] = self._dump(request, collector)
+        return response
+
+    @staticmethod
+    def _server_timing(collector, total):
+        metrics = [
+            f"total;dur={total * 1000:.1f}",
+            f'sql;dur={collector.sql_time * 1000:.1f};desc="{collector.sql_count} queries"',
+            f'tpl;dur={collector.render_time() * 1000:.1f};desc="templates (self)"',
+        ]
+        for i, (name, count, cumulative, _) in enumerate(collector.top(SERVER_TIMING_TOP), 1):
+            label = name.replace('"', "'")
+            metrics.append(f'tpl{i};dur={cumulative * 1000:.1f};desc="{label} x{count}"')
+        return ", ".join(metrics)
+
+    @staticmethod
+    def _dump(request, collector):
+        os.makedirs(settings.TEMPLATE_PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r"[^\w-]+", "-", request.path).strip("-") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug[:60]}.folded"
+        path = os.path.join(settings.TEMPLATE_PROFILE_DIR, name)
+        with open(path, "w") as f:
+            f.write(collector.collapsed())
+        logger.info("profile for %s written to %s", request.path, path)
+        return name
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scopes core.routers to the request: decides per view whether reads may
+    go to the replica, and pins the browser to the primary for
+    REPLICA_PIN_SECONDS after any request that wrote.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REPLICA_DATABASE", None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = routers.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end(token)
+        return self._pin(request, state, response)
+
+    async def __acall__(self, request):
+        # async ORM calls run in a thread with a copy of this context, so
+        # they see (and mark as wrote) the same RoutingState
+        state, token = routers.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.end(token)
+        return self._pin(request, state, response)
+
+    @staticmethod
+    def _pin(request, state, response):
+        if state.wrote:
+            response.set_cookie(
+                routers.PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+                secure=request.is_secure(),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = routers.current()
+        state.replica = (
+            getattr(view_func, "read_replica", False)
+            and request.method in ("GET", "HEAD")
+            and routers.PIN_COOKIE not in request.COOKIES
+        )
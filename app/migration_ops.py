@@ -0,0 +1,29 @@
+"""
+Migration operations for big tables.
+
+AddIndexOnline is AddIndex that, on MySQL, builds the index with
+ALGORITHM=INPLACE, LOCK=NONE: InnoDB keeps serving reads and writes while
+the index is built and only takes the metadata lock briefly at the start
+and end. If the server can't build it in place, the statement fails rather
+than silently copying the table under a lock. Other databases use the
+plain AddIndex path.
+"""
+from django.db import migrations
+
+
+class AddIndexOnline(migrations.AddIndex):
+    # seconds to wait for the metadata lock before giving up, instead of
+    # queueing every query on the table behind a long-running transaction
+    lock_wait_timeout = 10
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor != "mysql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        schema_editor.execute(f"SET SESSION lock_wait_timeout = {self.lock_wait_timeout}")
+        schema_editor.execute(f"{self.index.create_sql(model, schema_editor)} ALGORITHM=INPLACE LOCK=NONE")
+
+    def describe(self):
+        return super().describe() + " (online on MySQL)"
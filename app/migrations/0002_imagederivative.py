@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Original file name in MEDIA_ROOT', max_length=255, unique=True)),
+                ('digest', models.CharField(help_text='sha256 of the original; names the derivative folder', max_length=64)),
+                ('widths', models.JSONField(default=list)),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
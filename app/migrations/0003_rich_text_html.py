@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_imagederivative'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='faq',
+            name='answer_html',
+            field=models.TextField(blank=True, editable=False, help_text='Rendered from answer on save'),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, help_text='Rendered from content on save'),
+        ),
+        migrations.AddField(
+            model_name='termssection',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, help_text='Rendered from content on save'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_rich_text_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='universalcombo',
+            index=models.Index(fields=['main_model'], name='app_univers_main_mo_5fbeaf_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_universalcombo_main_model_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComboImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(help_text='dumpdata-style JSON (as uc_in_db) or CSV', upload_to='imports/')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('size', models.PositiveBigIntegerField(default=0, help_text='File size in bytes')),
+                ('position', models.PositiveBigIntegerField(default=0, help_text='Bytes read so far')),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('inserted', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list, help_text='Messages for the first skipped rows')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Combo Import',
+                'verbose_name_plural': 'Combo Imports',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
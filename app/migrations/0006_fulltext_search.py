@@ -0,0 +1,51 @@
+# FULLTEXT index on MySQL, FTS5 table + sync triggers on SQLite (see app/search.py).
+# The SQL is spelled out here so later changes to app.search can't alter this migration.
+
+from django.db import migrations
+
+SQL = {
+    'mysql': (
+        [
+            'ALTER TABLE `app_universalcombo` ADD FULLTEXT INDEX `app_universalcombo_fulltext` (`main_model`, `compatible_models`, `description`)',
+        ],
+        [
+            'ALTER TABLE `app_universalcombo` DROP INDEX `app_universalcombo_fulltext`',
+        ],
+    ),
+    'sqlite': (
+        [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS app_universalcombo_fts USING fts5(main_model, compatible_models, description, content='app_universalcombo', content_rowid='id')",
+            'CREATE TRIGGER IF NOT EXISTS app_universalcombo_fts_ai AFTER INSERT ON app_universalcombo BEGIN INSERT INTO app_universalcombo_fts(rowid, main_model, compatible_models, description) VALUES (new.id, new.main_model, new.compatible_models, new.description); END',
+            "CREATE TRIGGER IF NOT EXISTS app_universalcombo_fts_ad AFTER DELETE ON app_universalcombo BEGIN INSERT INTO app_universalcombo_fts(app_universalcombo_fts, rowid, main_model, compatible_models, description) VALUES ('delete', old.id, old.main_model, old.compatible_models, old.description); END",
+            "CREATE TRIGGER IF NOT EXISTS app_universalcombo_fts_au AFTER UPDATE ON app_universalcombo BEGIN INSERT INTO app_universalcombo_fts(app_universalcombo_fts, rowid, main_model, compatible_models, description) VALUES ('delete', old.id, old.main_model, old.compatible_models, old.description); INSERT INTO app_universalcombo_fts(rowid, main_model, compatible_models, description) VALUES (new.id, new.main_model, new.compatible_models, new.description); END",
+            "INSERT INTO app_universalcombo_fts(app_universalcombo_fts) VALUES ('rebuild')",
+        ],
+        [
+            'DROP TRIGGER IF EXISTS app_universalcombo_fts_ai',
+            'DROP TRIGGER IF EXISTS app_universalcombo_fts_ad',
+            'DROP TRIGGER IF EXISTS app_universalcombo_fts_au',
+            'DROP TABLE IF EXISTS app_universalcombo_fts',
+        ],
+    ),
+}
+
+
+def forwards(apps, schema_editor):
+    for sql in SQL.get(schema_editor.connection.vendor, ([], []))[0]:
+        schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    for sql in SQL.get(schema_editor.connection.vendor, ([], []))[1]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_comboimport'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
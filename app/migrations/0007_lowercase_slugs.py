@@ -0,0 +1,42 @@
+# Slugs are stored lowercase from now on (see the models' save()), so URL
+# lookups can be exact matches instead of __iexact (UPPER()/LIKE).
+
+from django.core.cache import cache
+from django.db import migrations
+
+BATCH = 2000
+
+
+def lowercase_slugs(model):
+    """Lowercase every slug; one that would clash with an existing slug gets -2, -3…"""
+    changes, last = [], 0
+    while True:
+        rows = list(model.objects.filter(pk__gt=last).order_by("pk").values_list("pk", "slug")[:BATCH])
+        if not rows:
+            break
+        last = rows[-1][0]
+        changes += [(pk, slug) for pk, slug in rows if slug != slug.lower()]
+    for pk, slug in changes:
+        base = new = slug.lower()
+        n = 2
+        while model.objects.filter(slug=new).exclude(pk=pk).exists():
+            new = f"{base}-{n}"
+            n += 1
+        model.objects.filter(pk=pk).update(slug=new)
+
+
+def forwards(apps, schema_editor):
+    for name in ("Brand", "Category", "UniversalCombo"):
+        lowercase_slugs(apps.get_model("app", name))
+    cache.delete_many(["slug-ids:app.brand", "slug-ids:app.category"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:28
+
+from django.db import migrations, models
+
+from app.migration_ops import AddIndexOnline
+
+
+class Migration(migrations.Migration):
+
+    # each index is its own online DDL statement on MySQL; no wrapping transaction
+    atomic = False
+
+    dependencies = [
+        ('app', '0007_lowercase_slugs'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='universalcombo',
+            options={'ordering': ['brand_id', 'category_id', 'main_model'], 'verbose_name': 'Universal Combo', 'verbose_name_plural': 'Universal Combos'},
+        ),
+        AddIndexOnline(
+            model_name='universalcombo',
+            index=models.Index(fields=['brand', 'category', 'main_model'], name='app_uc_brand_cat_model_idx'),
+        ),
+        AddIndexOnline(
+            model_name='universalcombo',
+            index=models.Index(fields=['category', 'brand', 'main_model'], name='app_uc_cat_brand_model_idx'),
+        ),
+        AddIndexOnline(
+            model_name='universalcombo',
+            index=models.Index(fields=['active', 'updated_at'], name='app_uc_active_updated_idx'),
+        ),
+    ]
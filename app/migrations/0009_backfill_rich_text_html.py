@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.utils.html import escape, linebreaks
+
+# model → (source field, rendered field)
+TARGETS = (
+    ("PolicySection", "content", "content_html"),
+    ("TermsSection", "content", "content_html"),
+    ("FAQ", "answer", "answer_html"),
+)
+
+
+def backfill(apps, schema_editor):
+    # Rows saved before 0003 have no stored HTML. Fill it with escaped
+    # paragraphs (what the templates fall back to) rather than importing the
+    # current renderer; `manage.py render_rich_text`, run on every deploy,
+    # replaces it with the full rich-text rendering.
+    for model_name, source, target in TARGETS:
+        model = apps.get_model("app", model_name)
+        rows = model.objects.filter(**{target: ""}).exclude(**{source: ""})
+        for obj in rows.only("pk", source).iterator(chunk_size=500):
+            model.objects.filter(pk=obj.pk).update(**{target: linebreaks(escape(getattr(obj, source)))})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_universalcombo_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+
+from .richtext import render_rich_text
 from django.utils.text import slugify
 from django.utils import timezone
 
+# slug → id map for Brand/Category URL lookups (app.utils.slug_ids)
+SLUG_IDS_CACHE_KEY = "slug-ids:%s"
+
 # ========== Nav Link  Main ==========
 
 
@@ -127,6 +134,16 @@ class Brand(models.Model):
     def __str__(self):
         return f"{self.name}"
 
+    def save(self, *args, **kwargs):
+        # stored lowercase so URL lookups are exact matches on the unique index
+        self.slug = self.slug.lower()
+        super().save(*args, **kwargs)
+        cache.delete(SLUG_IDS_CACHE_KEY % self._meta.label_lower)
+
+    def delete(self, *args, **kwargs):
+        cache.delete(SLUG_IDS_CACHE_KEY % self._meta.label_lower)
+        return super().delete(*args, **kwargs)
+
 
 # ----------------------
 # CATEGORIES
@@ -147,6 +164,15 @@ class Category(models.Model):
     def __str__(self):
         return f"{self.name}"
 
+    def save(self, *args, **kwargs):
+        self.slug = self.slug.lower()
+        super().save(*args, **kwargs)
+        cache.delete(SLUG_IDS_CACHE_KEY % self._meta.label_lower)
+
+    def delete(self, *args, **kwargs):
+        cache.delete(SLUG_IDS_CACHE_KEY % self._meta.label_lower)
+        return super().delete(*args, **kwargs)
+
 
 class UniversalCombo(models.Model):
     main_model = models.CharField(
@@ -175,7 +201,20 @@ class UniversalCombo(models.Model):
     active = models.BooleanField(default=True)
 
     class Meta:
-        ordering = ["brand", "category", "main_model"]
+        # FK columns, not "brand"/"category" (which sort through joins on the
+        # related models' ordering), so the composite indexes below return
+        # rows already in order
+        ordering = ["brand_id", "category_id", "main_model"]
+        indexes = [
+            # prefix search ("^main_model") in the admin
+            models.Index(fields=["main_model"]),
+            # brand list pages, and the default ordering
+            models.Index(fields=["brand", "category", "main_model"], name="app_uc_brand_cat_model_idx"),
+            # category list pages
+            models.Index(fields=["category", "brand", "main_model"], name="app_uc_cat_brand_model_idx"),
+            # recently updated active combos
+            models.Index(fields=["active", "updated_at"], name="app_uc_active_updated_idx"),
+        ]
         verbose_name = "Universal Combo"
         verbose_name_plural = "Universal Combos"
 
@@ -184,6 +223,7 @@ class UniversalCombo(models.Model):
             self.slug = slugify(
                 f"{self.main_model}-{self.brand.name}-{self.category.name}"
             )
+        self.slug = self.slug.lower()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -212,6 +252,7 @@ class Footer(models.Model):
 class FAQ(models.Model):
     question = models.CharField(max_length=255)
     answer = models.TextField()
+    answer_html = models.TextField(blank=True, editable=False, help_text="Rendered from answer on save")
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
@@ -220,6 +261,10 @@ class FAQ(models.Model):
     def __str__(self):
         return f"{self.order}. {self.question}"
 
+    def save(self, *args, **kwargs):
+        self.answer_html = render_rich_text(self.answer)
+        super().save(*args, **kwargs)
+
 
 # ========== Footer Link Sections ==========
 class FooterSection(models.Model):
@@ -460,6 +505,7 @@ class PolicySection(models.Model):
     icon = models.CharField(max_length=50, blank=True, help_text="Bootstrap icon class, e.g. 'bi bi-card-list'")
     title = models.CharField(max_length=200)
     content = models.TextField()
+    content_html = models.TextField(blank=True, editable=False, help_text="Rendered from content on save")
     order = models.PositiveIntegerField(default=0, help_text="Order of appearance")
 
     class Meta:
@@ -468,6 +514,10 @@ class PolicySection(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.content_html = render_rich_text(self.content)
+        super().save(*args, **kwargs)
+
 
 
 
@@ -479,6 +529,7 @@ class TermsSection(models.Model):
     icon = models.CharField(max_length=50, blank=True, help_text="Bootstrap icon class, e.g. 'bi bi-patch-check-fill'")
     title = models.CharField(max_length=200)
     content = models.TextField()
+    content_html = models.TextField(blank=True, editable=False, help_text="Rendered from content on save")
     order = models.PositiveIntegerField(default=0, help_text="Order of appearance")
 
     class Meta:
@@ -486,3 +537,70 @@ class TermsSection(models.Model):
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.content_html = render_rich_text(self.content)
+        super().save(*args, **kwargs)
+
+
+class ImageDerivative(models.Model):
+    """
+    Resized WebP/JPEG variants generated for an uploaded image (see app/images.py).
+    """
+    source = models.CharField(max_length=255, unique=True, help_text="Original file name in MEDIA_ROOT")
+    digest = models.CharField(max_length=64, help_text="sha256 of the original; names the derivative folder")
+    widths = models.JSONField(default=list)
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} ({len(self.widths)} sizes)"
+
+
+class ComboImport(models.Model):
+    """
+    A JSON/CSV combo file uploaded in the admin, imported in batches by
+    `manage.py run_combo_imports` (see app/imports.py).
+    """
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    file = models.FileField(upload_to="imports/", help_text="dumpdata-style JSON (as uc_in_db) or CSV")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    size = models.PositiveBigIntegerField(default=0, help_text="File size in bytes")
+    position = models.PositiveBigIntegerField(default=0, help_text="Bytes read so far")
+    processed = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="Messages for the first skipped rows")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Combo Import"
+        verbose_name_plural = "Combo Imports"
+
+    def __str__(self):
+        return f"{self.file.name} ({self.status})"
+
+    @property
+    def percent(self):
+        if self.status == self.DONE:
+            return 100
+        return min(99, int(self.position * 100 / self.size)) if self.size else 0
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at or not self.processed:
+            return 0
+        end = self.finished_at or timezone.now()
+        seconds = (end - self.started_at).total_seconds()
+        return round(self.processed / seconds) if seconds > 0 else 0
@@ -0,0 +1,106 @@
+"""
+Opt-in per-request template timing (settings.TEMPLATE_TIMING).
+
+Template.render is wrapped so every top-level render and {% include %} is
+timed while a collector is active for the current request. The collector
+keeps per-template counts, cumulative and self time, SQL time, and the
+collapsed stacks ("page;include;include 1234") that flame-graph tools
+(flamegraph.pl, speedscope, inferno) read directly.
+"""
+import contextvars
+import time
+from collections import defaultdict
+
+from django.template.base import Template
+
+_collector = contextvars.ContextVar("template_timing_collector", default=None)
+_original_render = Template.render
+
+
+class Collector:
+    def __init__(self, root="request"):
+        self.stack = [root]
+        self.child_time = [0.0]
+        self.stats = defaultdict(lambda: [0, 0.0, 0.0])  # name → [count, cumulative, self]
+        self.stacks = defaultdict(float)  # collapsed stack → self seconds
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+    def enter(self, name):
+        self.stack.append(name)
+        self.child_time.append(0.0)
+
+    def leave(self, elapsed):
+        children = self.child_time.pop()
+        own = max(elapsed - children, 0.0)
+        name = self.stack[-1]
+        stat = self.stats[name]
+        stat[0] += 1
+        stat[1] += elapsed
+        stat[2] += own
+        self.stacks[";".join(self.stack)] += own
+        self.stack.pop()
+        self.child_time[-1] += elapsed
+
+    def add_sql(self, elapsed):
+        self.sql_count += 1
+        self.sql_time += elapsed
+        # attribute to whichever template (or the view) was running the query
+        self.stacks[";".join(self.stack) + ";SQL"] += elapsed
+        self.child_time[-1] += elapsed
+
+    def finish(self, total):
+        """Charge view time outside templates and SQL to the root frame."""
+        self.stacks[self.stack[0]] += max(total - self.child_time[0], 0.0)
+
+    def render_time(self):
+        return sum(s[2] for s in self.stats.values())
+
+    def top(self, n=10):
+        """[(name, count, cumulative, self)] by self time."""
+        rows = [(name, *stat) for name, stat in self.stats.items()]
+        return sorted(rows, key=lambda r: r[3], reverse=True)[:n]
+
+    def collapsed(self):
+        """Flame-graph input: one "frame;frame;frame microseconds" line per stack."""
+        return "\n".join(
+            f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(self.stacks.items()) if seconds > 0
+        ) + "\n"
+
+
+def _timed_render(self, context):
+    collector = _collector.get()
+    if collector is None:
+        return _original_render(self, context)
+    collector.enter(self.name or "<string>")
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        collector.leave(time.perf_counter() - start)
+
+
+def install():
+    Template.render = _timed_render
+
+
+def start(root="request"):
+    collector = Collector(root)
+    return collector, _collector.set(collector)
+
+
+def stop(token):
+    _collector.reset(token)
+
+
+def sql_wrapper(collector):
+    """connection.execute_wrapper() hook that charges query time to the collector."""
+
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            collector.add_sql(time.perf_counter() - start)
+
+    return wrapper
@@ -0,0 +1,158 @@
+"""
+Admin-authored rich text (policy/terms sections, FAQ answers) rendered to
+sanitized HTML once, on save, instead of on every page view.
+
+Syntax, on top of a small whitelist of inline HTML:
+    **text**      highlighted <span class='mark'>
+    *text*        <em>
+    `code`        <code>
+    [label](url)  link (http, https, mailto, or site-relative)
+    - item        bullet list (also "* item"); "1. item" for numbered lists
+    blank line    new paragraph; single newline → <br>
+"""
+import re
+from html import escape
+from html.parser import HTMLParser
+
+ALLOWED_TAGS = {"b", "strong", "i", "em", "u", "br", "code", "mark", "span", "a", "ul", "ol", "li", "p"}
+ALLOWED_ATTRS = {"a": {"href", "title"}, "span": {"class"}}
+VOID_TAGS = {"br"}
+DROP_CONTENT_TAGS = {"script", "style", "iframe", "object", "template"}
+SAFE_URL_RE = re.compile(r"^(https?:|mailto:|/|#)", re.I)
+
+MARK_RE = re.compile(r"\*\*(.+?)\*\*")
+EM_RE = re.compile(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?![*\w])")
+CODE_RE = re.compile(r"`([^`]+)`")
+LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+BULLET_RE = re.compile(r"^\s*[-*]\s+(.*)$")
+NUMBERED_RE = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+PARA_SPLIT_RE = re.compile(r"\n{2,}")
+
+
+class _Sanitizer(HTMLParser):
+    """
+    Re-emits whitelisted tags/attributes, drops the rest, and escapes all
+    text. The inline syntax is applied here, to text nodes only, so it can
+    never produce markup inside an attribute value.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip += 1
+            return
+        if self.skip or tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_ATTRS.get(tag, ()) or value is None:
+                continue
+            if name == "href" and not SAFE_URL_RE.match(value.strip()):
+                continue
+            # newlines as references, so the block rules never split a tag
+            value = escape(value).replace("\r", "&#13;").replace("\n", "&#10;")
+            kept.append(f' {name}="{value}"')
+        if tag == "a":
+            kept.append(' rel="nofollow noopener"')
+        self.out.append(f"<{tag}{''.join(kept)}>")
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip = max(0, self.skip - 1)
+            return
+        if self.skip or tag not in self.open:
+            return
+        # close anything left open inside it so the output stays balanced
+        while self.open:
+            t = self.open.pop()
+            self.out.append(f"</{t}>")
+            if t == tag:
+                break
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        text = escape(data, quote=False)
+        if "code" not in self.open:
+            text = render_inline(text, links="a" not in self.open)
+        self.out.append(text)
+
+    def close(self):
+        super().close()
+        self.out.extend(f"</{t}>" for t in reversed(self.open))
+        self.open = []
+        return "".join(self.out)
+
+
+def sanitize(html):
+    parser = _Sanitizer()
+    parser.feed(html)
+    return parser.close()
+
+
+def _link(m):
+    label, url = m.group(1), m.group(2)
+    if not SAFE_URL_RE.match(url):
+        return m.group(0)
+    url = url.replace('"', "&quot;")
+    return f'<a href="{url}" rel="nofollow noopener">{label}</a>'
+
+
+def render_inline(text, links=True):
+    """Inline syntax on one already-escaped text node."""
+    # odd-indexed parts are `code` spans, left untouched by the other rules
+    parts = CODE_RE.split(text)
+    for i, part in enumerate(parts):
+        if i % 2:
+            parts[i] = f"<code>{part}</code>"
+        else:
+            if links:  # no <a> inside an <a>
+                part = LINK_RE.sub(_link, part)
+            part = MARK_RE.sub(r"<span class='mark'>\1</span>", part)
+            parts[i] = EM_RE.sub(r"<em>\1</em>", part)
+    return "".join(parts)
+
+
+def _line_kind(line):
+    for pattern, tag in ((BULLET_RE, "ul"), (NUMBERED_RE, "ol")):
+        m = pattern.match(line)
+        if m:
+            return tag, m.group(1)
+    return "p", line
+
+
+def _render_block(block):
+    if block.startswith(("<p>", "<p ", "<ul", "<ol")):
+        return block  # already a block element in the source
+    # consecutive list lines become one list; other runs one paragraph
+    out, run, run_tag = [], [], None
+    for tag, text in map(_line_kind, block.split("\n")):
+        if tag != run_tag and run:
+            out.append(_render_run(run_tag, run))
+            run = []
+        run_tag = tag
+        run.append(text)
+    out.append(_render_run(run_tag, run))
+    return "".join(out)
+
+
+def _render_run(tag, lines):
+    if tag == "p":
+        return "<p>%s</p>" % "<br>".join(lines)
+    return "<%s>%s</%s>" % (tag, "".join(f"<li>{line}</li>" for line in lines), tag)
+
+
+def render_rich_text(source):
+    """Source text → sanitized HTML, safe to output with |safe."""
+    if not source:
+        return ""
+    text = sanitize(source.replace("\r\n", "\n").replace("\r", "\n").strip())
+    blocks = [b.strip("\n") for b in PARA_SPLIT_RE.split(text) if b.strip()]
+    return "\n\n".join(_render_block(b) for b in blocks)
@@ -0,0 +1,203 @@
+"""
+Word search over UniversalCombo and shop.Product, backed by the database's
+full-text index instead of LIKE '%term%' scans.
+
+    search(queryset, "realme 8, narzo 30")
+
+Commas separate alternatives; within one, every word must appear (as a word
+or word prefix) in one of the model's SEARCH_FIELDS. Matches are ordered by
+relevance unless rank=False.
+
+Backends, picked per connection:
+    mysql   FULLTEXT index, MATCH ... AGAINST (... IN BOOLEAN MODE)
+    sqlite  FTS5 external-content table kept in sync by triggers
+    other   icontains on every field (no index)
+
+The indexes are created by migrations (app 0006, shop 0003, which carry a
+copy of fulltext_sql()'s statements); `manage.py rebuild_search_index`
+recreates them. Async views use asearch().
+"""
+import functools
+import logging
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import F, FloatField, Func, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.lookups import GreaterThan
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = {
+    "app.universalcombo": ("main_model", "compatible_models", "description"),
+    "shop.product": ("name",),
+}
+
+MAX_ALTERNATIVES = 10
+MAX_WORDS = 8
+WORD_RE = re.compile(r"\w+")
+
+# InnoDB skips words shorter than innodb_ft_min_token_size (default 3), so
+# shorter ones ("8" in "realme 8") are checked with icontains on the rows
+# the index already narrowed down
+MYSQL_MIN_TOKEN = 3
+
+
+def index_name(table):
+    return f"{table}_fulltext"
+
+
+def fts_table(table):
+    return f"{table}_fts"
+
+
+def fulltext_sql(vendor, table, columns):
+    """(create statements, drop statements) for the search index of one table."""
+    if vendor == "mysql":
+        cols = ", ".join(f"`{c}`" for c in columns)
+        return (
+            [f"ALTER TABLE `{table}` ADD FULLTEXT INDEX `{index_name(table)}` ({cols})"],
+            [f"ALTER TABLE `{table}` DROP INDEX `{index_name(table)}`"],
+        )
+    if vendor != "sqlite":
+        return [], []
+    fts = fts_table(table)
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});"
+    return (
+        [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ],
+        [
+            f"DROP TRIGGER IF EXISTS {fts}_ai",
+            f"DROP TRIGGER IF EXISTS {fts}_ad",
+            f"DROP TRIGGER IF EXISTS {fts}_au",
+            f"DROP TABLE IF EXISTS {fts}",
+        ],
+    )
+
+
+def parse_query(query):
+    """'Realme 8, Narzo 30' → [['realme', '8'], ['narzo', '30']]"""
+    alternatives = []
+    for part in (query or "").lower().split(","):
+        words = WORD_RE.findall(part)[:MAX_WORDS]
+        if words:
+            alternatives.append(words)
+    return alternatives[:MAX_ALTERNATIVES]
+
+
+class Match(Func):
+    """MATCH (columns) AGAINST (%s IN BOOLEAN MODE); the columns must be exactly a FULLTEXT index."""
+
+    output_field = FloatField()
+
+    def __init__(self, *columns, against):
+        super().__init__(*columns)
+        self.against = against
+
+    def as_sql(self, compiler, connection, **extra_context):
+        columns, params = [], []
+        for expression in self.source_expressions:
+            sql, p = compiler.compile(expression)
+            columns.append(sql)
+            params.extend(p)
+        return f"MATCH ({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)", (*params, self.against)
+
+
+def _icontains(fields, words):
+    q = Q()
+    for word in words:
+        q &= functools.reduce(Q.__or__, (Q(**{f"{field}__icontains": word}) for field in fields))
+    return q
+
+
+@functools.lru_cache(maxsize=None)
+def _has_fts_table(alias, db_name, table):
+    """The FTS5 table and the triggers that keep it in sync; without them its results go stale."""
+    fts = fts_table(table)
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE (type = 'table' AND name = %s) OR (type = 'trigger' AND tbl_name = %s)",
+            (fts, table),
+        )
+        names = {name for (name,) in cursor.fetchall()}
+    if fts not in names:
+        return False
+    if not {f"{fts}_ai", f"{fts}_ad", f"{fts}_au"} <= names:
+        logger.warning("%s has lost its sync triggers; searching with LIKE. Run `manage.py rebuild_search_index`.", fts)
+        return False
+    return True
+
+
+def backend(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor == "mysql":
+        return "mysql"
+    table = queryset.model._meta.db_table
+    if connection.vendor == "sqlite" and _has_fts_table(queryset.db, connection.settings_dict["NAME"], table):
+        return "sqlite"
+    return "like"
+
+
+def search(queryset, query, rank=True, extra=None):
+    """
+    queryset narrowed to rows matching `query` (or the `extra` Q, e.g. an
+    exact slug), with a `relevance` annotation and ordered by it when rank.
+    An empty query returns queryset unchanged.
+    """
+    alternatives = parse_query(query)
+    if not alternatives:
+        return queryset
+    fields = SEARCH_FIELDS[queryset.model._meta.label_lower]
+    kind = backend(queryset)
+
+    if kind == "mysql" and all(any(len(w) >= MYSQL_MIN_TOKEN for w in words) for words in alternatives):
+        columns = [F(f) for f in fields]
+
+        def against(words):
+            return "(%s)" % " ".join(f"+{w}*" for w in words if len(w) >= MYSQL_MIN_TOKEN)
+
+        # each alternative's short words only narrow its own MATCH
+        condition = Q()
+        for words in alternatives:
+            short = [w for w in words if len(w) < MYSQL_MIN_TOKEN]
+            condition |= Q(GreaterThan(Match(*columns, against=against(words)), 0)) & _icontains(fields, short)
+        relevance = Match(*columns, against=" ".join(against(words) for words in alternatives))
+    elif kind == "sqlite":
+        table = queryset.model._meta.db_table
+        fts = fts_table(table)
+        against = " OR ".join("(%s)" % " AND ".join(f'"{w}"*' for w in words) for words in alternatives)
+        condition = Q(pk__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", (against,)))
+        # bm25() is lower for better matches
+        relevance = RawSQL(
+            f'SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = "{table}"."id"',
+            (against,),
+            output_field=FloatField(),
+        )
+    else:
+        condition = functools.reduce(Q.__or__, (_icontains(fields, words) for words in alternatives))
+        relevance = None
+
+    if extra is not None:
+        condition |= extra
+    queryset = queryset.filter(condition)
+    if rank and relevance is not None:
+        queryset = queryset.annotate(relevance=relevance).order_by("-relevance", "pk")
+    return queryset
+
+
+async def asearch(queryset, query, rank=True, extra=None):
+    """search() for async views; the result is still lazy, iterate it with `async for`."""
+    # the SQLite FTS table check introspects the database once per process,
+    # which can't happen on the event loop; after that backend() is cached
+    await sync_to_async(backend)(queryset)
+    return search(queryset, query, rank, extra)
@@ -0,0 +1,28 @@
+# app/signals.py
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save
+from .images import IMAGE_FIELDS, build_variants
+from .models import ImageDerivative
+
+
+def _make_handler(field_name):
+    def build_image_variants(sender, instance, **kwargs):
+        f = getattr(instance, field_name)
+        if not f or not f.name:
+            return
+        name = f.name
+        if ImageDerivative.objects.filter(source=name).exists():
+            return
+        # After commit so a rolled-back upload doesn't leave derivative rows behind
+        transaction.on_commit(lambda: build_variants(name))
+    return build_image_variants
+
+
+for label, field in IMAGE_FIELDS:
+    post_save.connect(
+        _make_handler(field),
+        sender=apps.get_model(label),
+        weak=False,
+        dispatch_uid=f"image-variants-{label}",
+    )
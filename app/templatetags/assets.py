@@ -0,0 +1,72 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+from django import template
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+MANIFEST_NAME = "assets.json"
+
+
+@lru_cache(maxsize=1)
+def load_manifest():
+    """Bundle paths written by `manage.py build_assets`; empty if it hasn't run."""
+    path = Path(settings.BASE_DIR) / "static" / "dist" / MANIFEST_NAME
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+@register.simple_tag
+def asset_bundle(kind):
+    """
+    Static path of the "css" or "js" bundle, or "" so templates fall back to the
+    unbundled files.
+    """
+    if settings.DEBUG:
+        load_manifest.cache_clear()  # pick up rebuilds without restarting runserver
+    return load_manifest().get(kind, "")
+
+
+@lru_cache(maxsize=16)
+def _read_critical(path):
+    try:
+        return (Path(settings.BASE_DIR) / "static" / path).read_text(encoding="utf-8")
+    except OSError:
+        return ""
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context):
+    """Inline above-the-fold CSS for the current url name, or "" if none was built."""
+    request = context.get("request")
+    match = getattr(request, "resolver_match", None)
+    path = load_manifest().get("critical", {}).get(match.view_name if match else "")
+    return mark_safe(_read_critical(path)) if path else ""
+
+
+@register.simple_tag(takes_context=True)
+def preload(context, href, as_, media="", crossorigin=False, fetchpriority=""):
+    """
+    Queue a `Link: rel=preload` header for this response (sent by PreloadMiddleware).
+    Renders nothing.
+
+    {% preload hero_url "image" media="(max-width: 767.98px)" fetchpriority="high" %}
+    """
+    request = context.get("request")
+    if request is None or not href:
+        return ""
+    link = f"<{href}>; rel=preload; as={as_}"
+    if media:
+        link += f'; media="{media}"'
+    if crossorigin:
+        link += "; crossorigin"
+    if fetchpriority:
+        link += f"; fetchpriority={fetchpriority}"
+    links = getattr(request, "preload_links", None)
+    if links is not None and link not in links:
+        links.append(link)
+    return ""
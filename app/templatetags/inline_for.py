@@ -0,0 +1,139 @@
+from html import escape
+
+from django import template
+from django.template.base import TextNode, VariableNode, render_value_in_context
+from django.template.defaultfilters import lower, upper
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import IncludeNode
+from django.utils.safestring import SafeString
+
+register = template.Library()
+
+# Filters the fast path can apply itself (no arguments, no autoescape handling)
+INLINE_FILTERS = {lower, upper}
+
+
+_NOT_FLATTENED = object()
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class InlineForNode(template.Node):
+    """
+    {% for %} for long lists of simple cards: the body, including any
+    {% include %} with a literal template name, is flattened once into text
+    chunks and per-item value lookups, so each item costs a few string joins
+    instead of a context push, an include and a node-list render.
+
+    Output is identical to {% for %}. Bodies using anything beyond text,
+    {{ var.attr|lower }}-style variables and plain includes (tags, forloop,
+    filters with arguments) fall back to a normal ForNode.
+    """
+
+    def __init__(self, loopvar, sequence, nodelist_loop, nodelist_empty):
+        self.loopvar = loopvar
+        self.sequence = sequence
+        self.nodelist_loop = nodelist_loop
+        self.nodelist_empty = nodelist_empty
+        self.fallback = ForNode([loopvar], sequence, False, nodelist_loop, nodelist_empty)
+        self._parts = _NOT_FLATTENED  # flattened body, or None when unsupported
+
+    def render(self, context):
+        engine = context.template.engine
+        if self._parts is _NOT_FLATTENED:
+            try:
+                self._parts = self._flatten(self.nodelist_loop, engine)
+            except _Unsupported:
+                self._parts = None
+        parts = self._parts
+        if parts is None:
+            return self.fallback.render(context)
+
+        values = self.sequence.resolve(context, ignore_failures=True)
+        if not values:
+            return self.nodelist_empty.render(context) if self.nodelist_empty else ""
+
+        # Variables not tied to the loop item render the same for every item
+        parts = [p.render_annotated(context) if isinstance(p, VariableNode) else p for p in parts]
+        autoescape = context.autoescape
+        out = []
+        append = out.append
+        for item in values:
+            for part in parts:
+                if isinstance(part, str):
+                    append(part)
+                    continue
+                value = part(item)
+                if type(value) is str:
+                    # plain text needs no localization: same bytes as django.utils.html.escape
+                    append(escape(value) if autoescape else value)
+                else:
+                    append(render_value_in_context(value, context))
+        return SafeString("".join(out))
+
+    def _flatten(self, nodelist, engine):
+        parts = []
+        for node in nodelist:
+            if isinstance(node, TextNode):
+                parts.append(node.s)
+            elif isinstance(node, VariableNode):
+                parts.append(self._getter(node))
+            elif isinstance(node, IncludeNode) and not node.extra_context and not node.isolated_context:
+                name = node.template.var
+                if not isinstance(name, str) or node.template.filters:
+                    raise _Unsupported
+                parts.extend(self._flatten(engine.get_template(name).nodelist, engine))
+            else:
+                raise _Unsupported
+        # merge adjacent text so the render loop does fewer appends
+        merged = []
+        for part in parts:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            else:
+                merged.append(part)
+        return merged
+
+    def _getter(self, node):
+        fe = node.filter_expression
+        lookups = getattr(fe.var, "lookups", None)
+        if not lookups or lookups[0] == "forloop":
+            raise _Unsupported
+        if lookups[0] != self.loopvar:
+            return node  # resolved once per render
+        if len(lookups) != 2 or any(args or func not in INLINE_FILTERS for func, args in fe.filters):
+            raise _Unsupported
+        attr = lookups[1]
+        filters = [func for func, _ in fe.filters]
+
+        def get(item):
+            try:
+                value = item[attr] if isinstance(item, dict) else getattr(item, attr)
+            except (KeyError, AttributeError):
+                value = ""  # what {{ }} renders for a missing attribute
+            for func in filters:
+                value = func(value)
+            return value
+
+        return get
+
+
+@register.tag("inline_for")
+def do_inline_for(parser, token):
+    """
+    {% inline_for combo in combo_list %}...{% empty %}...{% endinline_for %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 4 or bits[2] != "in":
+        raise template.TemplateSyntaxError("'inline_for' statements should look like 'inline_for x in y'")
+    sequence = parser.compile_filter(bits[3])
+    nodelist_loop = parser.parse(("empty", "endinline_for"))
+    token = parser.next_token()
+    if token.contents == "empty":
+        nodelist_empty = parser.parse(("endinline_for",))
+        parser.delete_first_token()
+    else:
+        nodelist_empty = None
+    return InlineForNode(bits[1], sequence, nodelist_loop, nodelist_empty)
@@ -0,0 +1,52 @@
+from django import template
+from app.images import get_variants, resized_url, srcset, variant_url
+
+register = template.Library()
+
+
+@register.inclusion_tag("partials/components/responsive-img.html")
+def responsive_img(image, alt="", sizes="100vw", css_class="", style="", loading="lazy", width="", height="", itemprop=""):
+    """
+    <picture> with WebP + JPEG srcsets for an ImageField value.
+    Falls back to the original file until its derivatives exist.
+
+    {% responsive_img product.image alt=product.name sizes="(min-width: 992px) 25vw, 50vw" %}
+    """
+    info = get_variants(getattr(image, "name", ""))
+    return {
+        "src": image.url if image else "",
+        "webp_srcset": srcset(info, "webp") if info else "",
+        "jpeg_srcset": srcset(info, "jpg") if info else "",
+        "alt": alt,
+        "sizes": sizes,
+        "css_class": css_class,
+        "style": style,
+        "loading": loading,
+        "width": width,
+        "height": height,
+        "itemprop": itemprop,
+    }
+
+
+@register.simple_tag
+def img_srcset(image, ext="webp"):
+    """Bare srcset string, e.g. for CSS image-set() backgrounds."""
+    info = get_variants(getattr(image, "name", ""))
+    return srcset(info, ext) if info else ""
+
+
+@register.simple_tag
+def img_variant(image, width, ext="webp"):
+    """URL of the smallest derivative at least `width` px wide (or the original)."""
+    info = get_variants(getattr(image, "name", ""))
+    if not info:
+        return image.url if image else ""
+    fits = [w for w in info["widths"] if w >= int(width)]
+    return variant_url(info, min(fits) if fits else max(info["widths"]), ext)
+
+
+@register.simple_tag(name="resized_url")
+def resized_url_tag(image, width, fmt="webp", quality=75):
+    """Signed on-demand resize URL for any width, e.g. {% resized_url product.image 480 %}"""
+    name = getattr(image, "name", "")
+    return resized_url(name, int(width), fmt, int(quality)) if name else ""
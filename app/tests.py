@@ -1,3 +1,788 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import logging
+import tempfile
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from core import log, routers
+from core.storage import StaticStorage
+from shop.models import Category as ShopCategory, Product
+
+from . import dbmetrics, images, search as search_module
+from .assets import UsedSelectors, build_css, collect_critical
+from .bulk import CSV_COLUMNS, chunked_update, pk_chunks, replace_in_compatible_models, stream_csv, stream_json
+from .imports import import_file, iter_csv, iter_json
+from .middleware import (
+    CompressionMiddleware,
+    PreloadMiddleware,
+    ReplicaRoutingMiddleware,
+    RequestIdMiddleware,
+    brotli,
+)
+
+from .models import FAQ, Brand, Category, UniversalCombo
+from .richtext import render_rich_text
+from .search import backend, parse_query, search
+from .utils import get_category_list, get_combo_list, slug_ids
+
+
+class RichTextTests(SimpleTestCase):
+    def test_inline_syntax(self):
+        self.assertEqual(
+            render_rich_text("see [docs](/d?a=1) and **this** *too* `**raw**`\n- one\n- two"),
+            """<p>see <a href="/d?a=1" rel="nofollow noopener">docs</a> and <span class='mark'>this</span> """
+            "<em>too</em> <code>**raw**</code></p><ul><li>one</li><li>two</li></ul>",
+        )
+
+    def test_syntax_inside_attributes_stays_text(self):
+        html = render_rich_text('<a href="/ok" title="[x](/y/onmouseover=location=name//)">z</a>')
+        self.assertEqual(
+            html, '<p><a href="/ok" title="[x](/y/onmouseover=location=name//)" rel="nofollow noopener">z</a></p>'
+        )
+        html = render_rich_text('<span class="**x" onclick="alert(1)">a**</span>')
+        self.assertEqual(html, '<p><span class="**x">a**</span></p>')
+
+    def test_blank_line_in_attribute_does_not_split_the_tag(self):
+        html = render_rich_text('<a href="/ok" title="a\n\n- b">z</a>')
+        self.assertEqual(html, '<p><a href="/ok" title="a&#10;&#10;- b" rel="nofollow noopener">z</a></p>')
+
+    def test_no_nested_links_and_unsafe_urls(self):
+        self.assertEqual(
+            render_rich_text('<a href="/a">[in](/b)</a> [x](javascript:alert(1))'),
+            '<p><a href="/a" rel="nofollow noopener">[in](/b)</a> [x](javascript:alert(1))</p>',
+        )
+
+
+class FAQCardTests(TestCase):
+    def test_falls_back_to_plain_answer(self):
+        faq = FAQ.objects.create(question="Q?", answer="Line one\nline <two>")
+        FAQ.objects.filter(pk=faq.pk).update(answer_html="")  # saved before answer_html existed
+        faq.refresh_from_db()
+        html = engines["django"].from_string(
+            "{% for faq in faqs %}{% include 'partials/components/faq-card.html' %}{% endfor %}"
+        ).render({"faqs": [faq]})
+        self.assertIn("<p>Line one<br>line &lt;two&gt;</p>", html)
+
+
+class AssetPruningTests(SimpleTestCase):
+    def test_keeps_database_and_dynamic_classes(self):
+        used = UsedSelectors()
+        used.add_template(
+            '<span class="role-badge {{ member.role.badge_class }}"></span><div class="alert alert-{{ tag }}"></div>'
+        )
+        css = build_css(
+            [".role-badge{a:1}.badge-designer{b:2}.alert-info{c:3}.unused{d:4}.alert .unused{e:5}"], used
+        )
+        self.assertEqual(css, ".role-badge{a:1}.badge-designer{b:2}.alert-info{c:3}")
+
+    def test_critical_css_keeps_first_paint_only(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".html") as f:
+            f.write('<nav class="navbar"><a class="btn"></a><div class="modal"><p class="modal-body"></p></div></nav>')
+            f.flush()
+            used = collect_critical([f.name])
+        css = build_css(
+            [
+                "nav{a:1}.navbar{b:2}.btn{c:3}.btn:hover{d:4}.modal{display:none}.modal-body{e:5}"
+                "@media (prefers-reduced-motion: reduce){.btn{f:6}}@keyframes spin{to{g:7}}p{h:8}"
+            ],
+            used,
+        )
+        self.assertEqual(css, "nav{a:1}.navbar{b:2}.btn{c:3}.modal{display:none}p{h:8}")
+
+
+class StaticStorageTests(SimpleTestCase):
+    def test_missing_file_warned_once(self):
+        with tempfile.TemporaryDirectory() as root:
+            (Path(root) / "site.css").write_text("body{}")
+            storage = StaticStorage(location=root, base_url="/static/")
+            with self.assertLogs("core.storage", "WARNING") as logs:
+                for _ in range(3):
+                    self.assertEqual(storage.url("img/og.jpg"), "/static/img/og.jpg")
+            self.assertEqual(len(logs.records), 1)
+            self.assertRegex(storage.url("site.css"), r"^/static/site\.\w{12}\.css$")
+
+
+class ResizedImageTests(SimpleTestCase):
+    def setUp(self):
+        from PIL import Image
+
+        media, cache_dir = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.addCleanup(cache_dir.cleanup)
+        self.media = Path(media.name)
+        settings_override = override_settings(MEDIA_ROOT=media.name, IMAGE_RESIZE_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # transparent PNG with one opaque red pixel
+        img = Image.new("RGBA", (40, 20), (0, 0, 0, 0))
+        img.putpixel((0, 0), (255, 0, 0, 255))
+        img.save(self.media / "logo.png")
+
+    def test_signed_url_renders(self):
+        response = self.client.get(images.resized_url("logo.png", 20, "jpg", 80))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+
+    def test_transparency_is_flattened_onto_white(self):
+        from PIL import Image
+
+        with Image.open(images.get_resized("logo.png", 20, "jpg", 90)) as img:
+            r, g, b = img.convert("RGB").getpixel((15, 5))
+        self.assertTrue(min(r, g, b) > 240, (r, g, b))
+
+    def test_tampered_requests_are_rejected(self):
+        sig = images.resize_signature("logo.png", 20, "jpg", 80)
+        self.assertTrue(images.check_resize_request(sig, "logo.png", 20, "jpg", 80))
+        for args in (("logo.png", 21, "jpg", 80), ("logo.png", 20, "webp", 80), ("logo.png", 20, "jpg", 81), ("other.png", 20, "jpg", 80)):
+            self.assertFalse(images.check_resize_request(sig, *args), args)
+        self.assertFalse(images.check_resize_request("0" * 20, "logo.png", 20, "jpg", 80))
+        response = self.client.get(f"/img/{'0' * 20}/20/jpg/80/logo.png")
+        self.assertEqual(response.status_code, 404)
+
+    def test_paths_outside_media_root_are_refused(self):
+        outside = self.media.parent / "secret.png"
+        (self.media / "logo.png").rename(outside)
+        self.addCleanup(outside.unlink)
+        for name in ("../secret.png", str(outside), "missing.png"):
+            self.assertIsNone(images.get_resized(name, 20, "jpg", 80), name)
+        response = self.client.get(images.resized_url("../secret.png", 20, "jpg", 80))
+        self.assertEqual(response.status_code, 404)
+
+
+class InlineForTests(TestCase):
+    CARD_LISTS = (
+        ("partials/section/combo-list.html", "combo_list", "combo"),
+        ("partials/section/category-list.html", "cate_list", "cate"),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name="Vivo", slug="vivo")
+        category = Category.objects.create(name="Folder", slug="folder")
+        UniversalCombo.objects.bulk_create(
+            UniversalCombo(
+                main_model=f"Y{i} <Pro> & \"5G\" O'Neil",
+                compatible_models=f"Y{i}A, Y{i}B, Ä",
+                slug=f"vivo-y{i}",
+                brand=brand,
+                category=category,
+            )
+            for i in range(50)
+        )
+
+    def _render_both(self, name, var, loopvar, items):
+        engine = engines["django"]
+        new = engine.get_template(name)
+        source = new.template.source.replace(f"{{% inline_for {loopvar} in", f"{{% for {loopvar} in")
+        old = engine.from_string(source.replace("{% endinline_for %}", "{% endfor %}"))
+        ctx = {var: items, "slug": "vivo"}
+        return old.render(ctx), new.render(ctx)
+
+    def test_output_matches_for_loop(self):
+        qs = UniversalCombo.objects.all()
+        for items in (list(qs), list(qs.values("main_model", "compatible_models")), []):
+            for name, var, loopvar in self.CARD_LISTS:
+                with self.subTest(template=name, items=type(items[0]).__name__ if items else "empty"):
+                    old, new = self._render_both(name, var, loopvar, items)
+                    self.assertEqual(old, new)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name="Realme", slug="realme")
+        category = Category.objects.create(name="Folder", slug="folder")
+        for main, compatible in (
+            ("Realme 8", "Realme 8 Pro, Narzo 30"),
+            ("Realme 9", "Realme 9i"),
+            ("Narzo 50", "Narzo 50A, Narzo 50 Prime"),
+        ):
+            UniversalCombo.objects.create(
+                main_model=main, compatible_models=compatible, brand=brand, category=category
+            )
+        shop_category = ShopCategory.objects.create(name="Tools", slug="tools")
+        Product.objects.create(category=shop_category, name="Folder Glass Kit", price=10, image="p.jpg")
+
+    def models(self, query, **kwargs):
+        return sorted(search(UniversalCombo.objects.all(), query, **kwargs).values_list("main_model", flat=True))
+
+    def test_uses_fts5_on_sqlite(self):
+        self.assertEqual(backend(UniversalCombo.objects.all()), "sqlite")
+
+    def test_mysql_short_words_belong_to_their_alternative(self):
+        with mock.patch.object(search_module, "backend", return_value="mysql"):
+            qs = search(UniversalCombo.objects.all(), "realme 8, narzo")
+        where = str(qs.query).split(" WHERE ")[1].split(" ORDER BY ")[0]
+        match = r"MATCH \([^)]*\) AGAINST \(\({}\) IN BOOLEAN MODE\) > 0(?:\.0)?"
+        self.assertRegex(
+            where,
+            r"^\(\({} AND \([^()]*LIKE %8%[^()]*\)\) OR {}\)$".format(
+                match.format(r"\+realme\*"), match.format(r"\+narzo\*")
+            ),
+        )
+        self.assertIn("AGAINST ((+realme*) (+narzo*) IN BOOLEAN MODE)", str(qs.query))  # relevance
+
+    def test_stale_fts_table_not_used(self):
+        self.addCleanup(search_module._has_fts_table.cache_clear)
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER app_universalcombo_fts_au")  # e.g. lost in a table rebuild
+        search_module._has_fts_table.cache_clear()
+        with self.assertLogs("app.search", "WARNING"):
+            self.assertEqual(backend(UniversalCombo.objects.all()), "like")
+        self.assertEqual(self.models("narzo"), ["Narzo 50", "Realme 8"])
+
+    def test_parse_query(self):
+        self.assertEqual(parse_query(" Realme 8,, Narzo-30 "), [["realme", "8"], ["narzo", "30"]])
+        self.assertEqual(parse_query(' "*" ( '), [])
+
+    def test_words_and_alternatives(self):
+        self.assertEqual(self.models("realme 8"), ["Realme 8"])
+        self.assertEqual(self.models("narzo"), ["Narzo 50", "Realme 8"])
+        self.assertEqual(self.models("9i, prime"), ["Narzo 50", "Realme 9"])
+        self.assertEqual(self.models("nar"), ["Narzo 50", "Realme 8"])  # word prefix
+        self.assertEqual(self.models("iphone"), [])
+
+    def test_empty_query_is_unfiltered(self):
+        self.assertEqual(len(self.models("")), 3)
+
+    def test_ranked_by_relevance(self):
+        ranked = search(UniversalCombo.objects.all(), "narzo 50")
+        self.assertEqual(ranked[0].main_model, "Narzo 50")
+        self.assertTrue(hasattr(ranked[0], "relevance"))
+
+    def test_extra_condition(self):
+        slug = UniversalCombo.objects.get(main_model="Realme 9").slug
+        self.assertEqual(self.models("narzo 50", extra=Q(slug=slug)), ["Narzo 50", "Realme 9"])
+
+    def test_index_follows_writes(self):
+        combo = UniversalCombo.objects.get(main_model="Realme 9")
+        combo.compatible_models = "Realme 9 Speed"
+        combo.save()
+        self.assertEqual(self.models("speed"), ["Realme 9"])
+        self.assertEqual(self.models("9i"), [])
+        combo.delete()
+        self.assertEqual(self.models("speed"), [])
+
+    def test_products(self):
+        self.assertEqual(search(Product.objects.all(), "glass").count(), 1)
+        self.assertEqual(search(Product.objects.all(), "phone").count(), 0)
+
+
+# the views are @read_replica; rows created here only exist on the primary
+@override_settings(REPLICA_DATABASE=None)
+class SearchApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name="Realme", slug="realme")
+        category = Category.objects.create(name="Folder", slug="folder")
+        for main, compatible in (("Realme 8", "Realme 8 Pro, Narzo 30"), ("Realme 9", "Realme 9i")):
+            UniversalCombo.objects.create(main_model=main, compatible_models=compatible, brand=brand, category=category)
+        cls.user = User.objects.create_user("buyer", password="x")
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_search_needs_login(self):
+        for url in ("/api/combo-list/realme", "/api/combos/?q=realme", "/api/cate-list/folder"):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 302, url)
+
+    async def test_brand_search(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get("/api/combo-list/Realme", {"q": "9i"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"q": "9i", "items": [{"main_model": "Realme 9", "compatible_models": "Realme 9i"}], "more": False}
+        )
+        response = await self.async_client.get("/api/combo-list/realme", {"limit": 1})
+        self.assertEqual((len(response.json()["items"]), response.json()["more"]), (1, True))
+
+    async def test_lookup_across_brands(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get("/api/combos/", {"q": "narzo 30"})
+        self.assertEqual(
+            response.json()["items"],
+            [{"main_model": "Realme 8", "compatible_models": "Realme 8 Pro, Narzo 30", "brand__slug": "realme", "category__slug": "folder"}],
+        )
+        response = await self.async_client.get("/api/combos/")
+        self.assertEqual(response.json()["items"], [])
+
+    async def test_category_search(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get("/api/cate-list/folder", {"q": "realme"})
+        self.assertEqual(len(response.json()["items"]), 2)
+
+
+class ComboImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name="Vivo", slug="vivo")
+        cls.category = Category.objects.create(name="Folder", slug="folder")
+
+    def row(self, **fields):
+        return {"main_model": "Y20", "compatible_models": "Y20, Y20i", "brand": self.brand.id,
+                "category": self.category.id, **fields}
+
+    def import_json(self, rows, **kwargs):
+        errors = []
+        result = import_file(io.BytesIO(json.dumps(rows).encode()), "json",
+                             progress=lambda rows, inserted, errs, pos: errors.extend(errs), **kwargs)
+        return result, errors
+
+    def test_iter_json_across_chunks(self):
+        data = "\ufeff[" + ", ".join(json.dumps({"fields": {"main_model": f"M{i}"}}) for i in range(20)) + "]"
+        fh = io.BytesIO(data.encode())
+        items = [item for item, _ in iter_json(fh, chunk_size=7)]
+        self.assertEqual([item["main_model"] for item in items], [f"M{i}" for i in range(20)])
+        for bad in (b'{"a": 1}', b'[{"a": 1},', b'[{"a": }]'):
+            with self.subTest(bad), self.assertRaises(ValueError):
+                list(iter_json(io.BytesIO(bad)))
+
+    def test_iter_csv_admin_columns(self):
+        data = "\ufeffmain_model,compatible_models,brand_id,category_id,active\nY20,Y20i,1,2,False\nY21,Y21i,1,2,\n"
+        rows = [row for row, _ in iter_csv(io.BytesIO(data.encode()))]
+        self.assertEqual([(r["main_model"], r["brand"], r["category"], r["active"]) for r in rows],
+                         [("Y20", "1", "2", False), ("Y21", "1", "2", True)])
+
+    def test_bad_rows_reported_not_fatal(self):
+        rows = [
+            self.row(),
+            self.row(main_model="X" * 151),
+            self.row(created_at="yesterday"),
+            self.row(brand=999),
+            self.row(slug="not a slug"),
+            self.row(description={"a": 1}),
+            "nope",
+            self.row(main_model=20, created_at="2024-01-02T03:04:05", active="false"),
+        ]
+        (count, inserted), errors = self.import_json(rows, batch_size=3)
+        self.assertEqual((count, inserted), (8, 2))
+        self.assertEqual([e.split(":")[0] for e in errors], ["Row 2", "Row 3", "Row 4", "Row 5", "Row 6", "Row 7"])
+        combo = UniversalCombo.objects.get(main_model="20")
+        self.assertFalse(combo.active)
+        self.assertEqual(combo.created_at.year, 2024)
+
+    def test_slugs_suffixed_and_bounded(self):
+        long_name = "Galaxy " * 10
+        self.import_json([self.row(), self.row(), self.row(main_model=long_name), self.row(main_model=long_name)])
+        base = f"y20-{self.brand.id}-{self.category.id}"
+        slugs = set(UniversalCombo.objects.values_list("slug", flat=True))
+        self.assertEqual(len(slugs), 4)
+        self.assertTrue({base, base + "-1"} <= slugs)
+        self.assertTrue(all(len(slug) <= 50 for slug in slugs))
+
+    def test_conflicting_batch_retried(self):
+        bulk_create = UniversalCombo.objects.bulk_create
+        calls = []
+
+        def racing_bulk_create(objs, **kwargs):
+            calls.append([o.slug for o in objs])
+            if len(calls) == 1:  # e.g. another import took a slug after assign_slugs() looked
+                raise IntegrityError("duplicate slug")
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(UniversalCombo.objects, "bulk_create", racing_bulk_create):
+            (count, inserted), _ = self.import_json([self.row(), self.row()])
+        self.assertEqual((count, inserted), (2, 2))
+        self.assertEqual(calls[0], calls[1])  # slugs picked afresh, not suffixed twice
+        self.assertEqual(UniversalCombo.objects.count(), 2)
+
+
+class BulkEditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name="Vivo", slug="vivo")
+        category = Category.objects.create(name="Folder", slug="folder")
+        for i, compatible in enumerate(["Y20, Y20i", "y20, Y21", "V20", "Y20 Pro"]):
+            UniversalCombo.objects.create(
+                main_model=f"M{i}", compatible_models=compatible, slug=f"m{i}", brand=brand, category=category
+            )
+
+    def compatible(self):
+        return list(UniversalCombo.objects.order_by("pk").values_list("compatible_models", flat=True))
+
+    def test_pk_chunks(self):
+        pks = list(UniversalCombo.objects.order_by("pk").values_list("pk", flat=True))
+        self.assertEqual(list(pk_chunks(UniversalCombo.objects.all(), 3)), [pks[:3], pks[3:]])
+
+    def test_chunked_update(self):
+        qs = UniversalCombo.objects.filter(main_model__in=["M0", "M2", "M3"])
+        self.assertEqual(chunked_update(qs, chunk_size=2, active=False), 3)
+        self.assertEqual(UniversalCombo.objects.filter(active=True).count(), 1)
+
+    def test_replace_is_case_sensitive_and_counted(self):
+        n = replace_in_compatible_models(UniversalCombo.objects.all(), "Y20", "Y20s", chunk_size=2)
+        self.assertEqual(n, 2)
+        self.assertEqual(self.compatible(), ["Y20s, Y20si", "y20, Y21", "V20", "Y20s Pro"])
+
+    def test_exports(self):
+        qs = UniversalCombo.objects.filter(main_model__in=["M0", "M1"])
+        lines = "".join(stream_csv(qs, chunk_size=1)).splitlines()
+        self.assertEqual(lines[0].split(","), list(CSV_COLUMNS))
+        self.assertEqual(len(lines), 3)
+        items = json.loads("".join(stream_json(qs, chunk_size=1)))
+        self.assertEqual([item["fields"]["compatible_models"] for item in items], ["Y20, Y20i", "y20, Y21"])
+        self.assertEqual([row["main_model"] for row, _ in iter_json(io.BytesIO(json.dumps(items).encode()))],
+                         ["M0", "M1"])
+
+
+class SlugLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brand = Brand.objects.create(name="Vivo", slug="Vivo")
+        self.category = Category.objects.create(name="Folder", slug="FOLDER")
+        UniversalCombo.objects.create(
+            main_model="Y20", compatible_models="Y20s", slug="Vivo-Y20", brand=self.brand, category=self.category
+        )
+
+    def test_slugs_stored_lowercase(self):
+        self.assertEqual(
+            [Brand.objects.get().slug, Category.objects.get().slug, UniversalCombo.objects.get().slug],
+            ["vivo", "folder", "vivo-y20"],
+        )
+        self.assertEqual(ShopCategory.objects.create(name="Tools", slug="Tools").slug, "tools")
+
+    def test_list_lookup_ignores_url_case(self):
+        for slug in ("vivo", "VIVO"):
+            self.assertEqual(len(get_combo_list(slug)["combo_list"]), 1)
+        self.assertEqual(len(get_category_list("Folder")["cate_list"]), 1)
+        self.assertEqual(len(get_combo_list("oppo")["combo_list"]), 0)
+
+    def test_renamed_slug_clears_map(self):
+        get_combo_list("vivo")
+        self.brand.slug = "vivo-phones"
+        self.brand.save()
+        self.assertEqual(len(get_combo_list("vivo")["combo_list"]), 0)
+        self.assertEqual(len(get_combo_list("vivo-phones")["combo_list"]), 1)
+
+
+class PreloadTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_links_remembered_once_and_sent_as_early_hints(self):
+        def view(request):
+            request.preload_links.append("</static/app.css>; rel=preload; as=style")
+            return HttpResponse("<p></p>")
+
+        hints = []
+        middleware = PreloadMiddleware(view)
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            for _ in range(3):
+                response = middleware(RequestFactory().get("/faq/", **{"wsgi.early_hints": hints.append}))
+        self.assertEqual(response["Link"], "</static/app.css>; rel=preload; as=style")
+        self.assertEqual(cache_set.call_count, 1)
+        self.assertEqual(len(hints), 2)
+
+
+class CompressionTests(SimpleTestCase):
+    page = b"<p>" + b"combo list " * 200 + b"</p>"
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def memo_key(body):
+        return f"compressed:gzip:{hashlib.sha256(body).hexdigest()}"
+
+    def compress(self, response, path="/", encoding="gzip, deflate, br"):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_brotli_preferred(self):
+        response = self.compress(HttpResponse(self.page))
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), self.page)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_gzip_when_brotli_not_accepted(self):
+        response = self.compress(HttpResponse(self.page), encoding="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.page)
+
+    def test_identity_still_varies(self):
+        response = self.compress(HttpResponse(self.page), encoding="identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, self.page)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_big_pages_memoized(self):
+        page = self.page * 10
+        first = self.compress(HttpResponse(page), encoding="gzip")
+        self.assertEqual(cache.get(self.memo_key(page)), first.content)
+        self.assertEqual(self.compress(HttpResponse(page), encoding="gzip").content, first.content)
+
+    def test_csrf_pages_gzip_only_padded_and_not_memoized(self):
+        forms = HttpResponse(self.page * 10 + b'<input name="csrfmiddlewaretoken" value="x">')
+        cookie = HttpResponse(self.page * 10)
+        cookie.set_cookie(settings.CSRF_COOKIE_NAME, "x")
+        for response in (forms, cookie):
+            body = response.content
+            response = self.compress(response)
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertTrue(response.content[3] & gzip.FNAME)  # the random-length padding
+            self.assertEqual(gzip.decompress(response.content), body)
+            self.assertIsNone(cache.get(self.memo_key(body)))
+
+    def test_passed_through(self):
+        encoded = HttpResponse(self.page)
+        encoded["Content-Encoding"] = "gzip"
+        no_transform = HttpResponse(self.page)
+        no_transform["Cache-Control"] = "no-transform"
+        cases = {
+            "streaming": (StreamingHttpResponse([self.page]), "/"),
+            "small": (HttpResponse(b"<p>hi</p>"), "/"),
+            "image": (HttpResponse(self.page, content_type="image/svg+xml"), "/"),
+            "static": (HttpResponse(self.page), settings.STATIC_URL + "site.html"),
+            "media": (HttpResponse(self.page), settings.MEDIA_URL + "a.txt"),
+            "no-transform": (no_transform, "/"),
+            "encoded": (encoded, "/"),
+        }
+        for case, (response, path) in cases.items():
+            with self.subTest(case):
+                body = None if response.streaming else response.content
+                response = self.compress(response, path)
+                if body is None:
+                    self.assertEqual(b"".join(response), self.page)
+                else:
+                    self.assertEqual(response.content, body)
+                self.assertFalse(response.has_header("Vary"))
+
+    def test_etag_weakened(self):
+        response = HttpResponse(self.page)
+        response["ETag"] = '"abc"'
+        self.assertEqual(self.compress(response)["ETag"], 'W/"abc"')
+
+    def test_async(self):
+        async def get_response(request):
+            return HttpResponse(self.page)
+
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = asyncio.run(CompressionMiddleware(get_response)(request))
+        self.assertEqual(gzip.decompress(response.content), self.page)
+
+
+@override_settings(REPLICA_DATABASE="replica", REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+    router = routers.ReplicaRouter()
+
+    def request(self, method="get", marked=True, cookies=None, action=None):
+        """Run a request through the middleware; returns (response, {name: alias} seen by the view)."""
+        seen = {}
+
+        def view(request):
+            if action:
+                action()
+            seen["combo"] = self.router.db_for_read(UniversalCombo)
+            seen["user"] = self.router.db_for_read(User)
+            return HttpResponse()
+
+        if marked:
+            view = routers.read_replica(view)
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies or {})
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request), seen
+
+    def test_marked_get_reads_content_from_replica(self):
+        _, seen = self.request()
+        self.assertEqual(seen, {"combo": "replica", "user": "default"})
+
+    def test_primary_otherwise(self):
+        for kwargs in ({"marked": False}, {"method": "post"}, {"cookies": {routers.PIN_COOKIE: "1"}}):
+            with self.subTest(**kwargs):
+                self.assertEqual(self.request(**kwargs)[1]["combo"], "default")
+
+    def test_write_pins_request_and_browser(self):
+        response, seen = self.request(action=lambda: self.router.db_for_write(Brand))
+        self.assertEqual(seen["combo"], "default")
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]["max-age"], 10)
+        self.assertNotIn(routers.PIN_COOKIE, self.request()[0].cookies)
+
+    def test_no_replica_outside_requests(self):
+        self.assertEqual(self.router.db_for_read(UniversalCombo), "default")
+
+
+class ConnectionMetricsTests(TestCase):
+    def cycle(self):
+        request_started.send(sender=None)
+        Brand.objects.exists()
+        request_finished.send(sender=None)
+
+    def test_kept_connection_counts_as_reused(self):
+        Brand.objects.exists()  # connect before the first cycle
+        before = dbmetrics.process_totals()["default"]
+        self.cycle()
+        self.cycle()
+        after = dbmetrics.process_totals()["default"]
+        self.assertEqual(after["reused"] - before["reused"], 2)
+        self.assertEqual(after["opened"], before["opened"])
+
+    def test_kept_connection_closed_at_next_start_counts_as_discarded(self):
+        Brand.objects.exists()
+        before = dbmetrics.process_totals()["default"]
+        self.cycle()
+        # close_old_connections found it obsolete (CONN_MAX_AGE) as the next request began
+        with mock.patch.object(connection, "connection", None):
+            request_started.send(sender=None)
+        request_finished.send(sender=None)
+        after = dbmetrics.process_totals()["default"]
+        self.assertEqual(after["reused"] - before["reused"], 1)
+        self.assertEqual(after["discarded"] - before["discarded"], 1)
+
+    def test_totals_include_unflushed_counts(self):
+        cache.clear()
+        dbmetrics.flush()
+        self.cycle()
+        self.assertGreaterEqual(dbmetrics.totals()["default"]["reused"], 1)
+
+
+class LoggingTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.handler = log.QueuedJsonFileHandler(self.dir / "app.log")
+        self.addCleanup(self.handler.close)
+        self.handler.addFilter(log.RequestIdFilter())
+        self.logger = logging.getLogger("tests.logging")
+        self.logger.propagate = False  # keep out of the LOGGING file
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def lines(self):
+        self.handler.close()  # drains the queue
+        return [json.loads(line) for line in (self.dir / "app.log").read_text().splitlines()]
+
+    def test_json_lines_carry_the_request_id(self):
+        def view(request):
+            self.logger.warning("login from IP %s", "10.0.0.1")
+            try:
+                1 / 0
+            except ZeroDivisionError:
+                self.logger.exception("failed")
+            return HttpResponse()
+
+        request = RequestFactory().get("/", HTTP_X_REQUEST_ID="abc-123")
+        response = RequestIdMiddleware(view)(request)
+        self.logger.warning("outside")
+        self.assertEqual(response["X-Request-ID"], "abc-123")
+        first, second, third = self.lines()
+        self.assertEqual((first["message"], first["request_id"], first["level"]), ("login from IP 10.0.0.1", "abc-123", "WARNING"))
+        self.assertIn("ZeroDivisionError", second["exc"])
+        self.assertNotIn("request_id", third)
+
+    def test_invalid_incoming_id_is_replaced(self):
+        request = RequestFactory().get("/", HTTP_X_REQUEST_ID="bad id\n")
+        response = RequestIdMiddleware(lambda r: HttpResponse())(request)
+        self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        self.handler.listener.stop()
+        self.handler.queue.maxsize = 1
+        for i in range(3):
+            self.logger.warning("line %s", i)
+        self.assertEqual(self.handler.dropped, 2)
+
+    def test_closed_handler_is_not_restarted_after_fork(self):
+        self.handler.close()
+        self.handler._after_fork()
+        self.assertIsNone(self.handler.listener._thread)
+
+    def test_processes_sharing_the_file_rotate_once(self):
+        path = str(self.dir / "shared.log")
+        first, second = (log.SharedRotatingFileHandler(path, maxBytes=100, backupCount=3, delay=True) for _ in range(2))
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+
+        def write(handler, msg):
+            handler.handle(logging.makeLogRecord({"msg": msg}))
+
+        write(first, "a" * 60)
+        write(second, "b" * 30)
+        write(first, "c" * 60)  # full: rotates
+        write(second, "d" * 30)  # follows the rotation instead of rotating again
+        self.assertEqual(sorted(p.name for p in self.dir.glob("shared.log*")), ["shared.log", "shared.log.1", "shared.log.lock"])
+        self.assertEqual((self.dir / "shared.log").read_text().split(), ["c" * 60, "d" * 30])
+
+    def test_sampling_keeps_warnings_and_whole_requests(self):
+        def passed(rate, level, request_id):
+            record = logging.makeLogRecord({"levelno": level, "request_id": request_id})
+            return log.SamplingFilter(rate).filter(record)
+
+        self.assertFalse(passed(0, logging.INFO, "abc"))
+        self.assertTrue(passed(0, logging.WARNING, "abc"))
+        kept = [passed(0.5, logging.INFO, f"req-{i}") for i in range(1000)]
+        self.assertTrue(300 < sum(kept) < 700)
+        self.assertEqual(kept, [passed(0.5, logging.INFO, f"req-{i}") for i in range(1000)])
+
+
+SEPARATE_REPLICA = "replica" in settings.DATABASES and not settings.DATABASES["replica"].get("TEST", {}).get("MIRROR")
+
+
+@skipUnless(SEPARATE_REPLICA, "needs a separate replica database (e.g. a second SQLite file)")
+class ReplicaDatabaseTests(TransactionTestCase):
+    # not TestCase: its per-test transaction would keep every read on the primary
+    databases = {"default", "replica"} if SEPARATE_REPLICA else {"default"}
+
+    def test_reads_hit_the_replica_until_a_write(self):
+        Brand.objects.create(name="Vivo", slug="vivo")  # primary only; nothing replicates in tests
+        counts = []
+
+        @routers.read_replica
+        def view(request):
+            counts.append(Brand.objects.count())
+            with transaction.atomic():
+                counts.append(Brand.objects.count())
+            Brand.objects.create(name="Oppo", slug="oppo")
+            counts.append(Brand.objects.count())
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(RequestFactory().get("/"))
+        self.assertEqual(counts, [0, 1, 2])
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_cached_slug_map_is_read_from_the_primary(self):
+        cache.clear()
+        Brand.objects.create(name="Vivo", slug="vivo")  # not on the replica
+        maps = []
+
+        @routers.read_replica
+        def view(request):
+            self.assertEqual(Brand.objects.count(), 0)  # this request does read the replica
+            maps.append(slug_ids(Brand))
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware(RequestFactory().get("/"))
+        self.assertIn("vivo", maps[0])
@@ -10,8 +10,13 @@ path("about/",about_view, name="about"),
 path("contact/",contact_view, name="contact"),
 path("combo-list/<slug:slug>",combo_list_view, name="combo-list"),
 path("cate-list/<slug:slug>",cate_list_view, name="cate-list"),
+path("api/combos/", combo_lookup_api, name="combo-lookup-api"),
+path("api/combo-list/<slug:slug>", combo_search_api, name="combo-search-api"),
+path("api/cate-list/<slug:slug>", cate_search_api, name="cate-search-api"),
 path("privacy-policy/", privacy_policy, name="privacy-policy"),
 path("terms-and-conditions/", terms_and_conditions, name="terms-and-conditions"),
 path('faq/',faq_view,name="faq"),
 path("robots.txt/", robots_txt, name="robots_txt"),
+path("metrics/db-connections/", db_connection_metrics, name="db-connection-metrics"),
+path("img/<str:sig>/<int:width>/<str:fmt>/<int:quality>/<path:name>", resized_image, name="resized-image"),
 ]
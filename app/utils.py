@@ -1,7 +1,14 @@
+import hashlib
+
 from .models import *
+from .search import asearch, search
 from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
 from datetime import date
 
+SEARCH_RESULTS_TTL = 60
+
 
 def common_context(page=" ", sec_name=""):
     # Navbar links (lean fields)
@@ -120,7 +127,7 @@ def get_contact_context():
 def get_faq_context():
     ctx = common_context("faq")
     ctx["faqs"] = (
-        FAQ.objects.only("question", "answer", "order")
+        FAQ.objects.only("question", "answer", "answer_html", "order")
         .order_by("-pk")[:20]
     )
     ctx["faq_title"] = get_section_title("faq section")
@@ -154,48 +161,87 @@ def get_term_context():
     return ctx
 
 
-def get_combo_list(slug):
+def slug_ids(model):
+    """{slug: id} for Brand/Category; cleared by their save()/delete()."""
+    key = SLUG_IDS_CACHE_KEY % model._meta.label_lower
+    ids = cache.get(key)
+    if ids is None:
+        # from the primary: a lagging replica would be cached for an hour
+        ids = dict(model.objects.using(DEFAULT_DB_ALIAS).values_list("slug", "id"))
+        cache.set(key, ids, 60 * 60)
+    return ids
+
+
+def combos_for(field, model, slug):
+    # slugs are stored lowercase, so the map lookup replaces a JOIN + UPPER()/LIKE
+    pk = slug_ids(model).get(slug.lower())
+    if pk is None:
+        return UniversalCombo.objects.none()
+    return UniversalCombo.objects.filter(**{f"{field}_id": pk})
+
+
+async def aslug_ids(model):
+    """slug_ids() for async views (same cache entry)."""
+    key = SLUG_IDS_CACHE_KEY % model._meta.label_lower
+    ids = await cache.aget(key)
+    if ids is None:
+        ids = {slug: pk async for slug, pk in model.objects.using(DEFAULT_DB_ALIAS).values_list("slug", "id")}
+        await cache.aset(key, ids, 60 * 60)
+    return ids
+
+
+async def acombos_for(field, model, slug):
+    pk = (await aslug_ids(model)).get(slug.lower())
+    if pk is None:
+        return UniversalCombo.objects.none()
+    return UniversalCombo.objects.filter(**{f"{field}_id": pk})
+
+
+async def search_combos(q, field=None, model=None, slug="", limit=50):
+    """
+    JSON-ready results for the async search API: the first `limit` combos of
+    one brand/category (field, model, slug) or, without a field, matches
+    across all combos. Cached for SEARCH_RESULTS_TTL.
+    """
+    if not field and not q:
+        return {"q": q, "items": [], "more": False}  # nothing to look up
+    raw = f"{field}|{slug.lower()}|{q.lower()}|{limit}"
+    key = f"combo-search:{hashlib.sha256(raw.encode()).hexdigest()}"
+    payload = await cache.aget(key)
+    if payload is not None:
+        return payload
+
+    if field:
+        combos = await acombos_for(field, model, slug)
+        values = ("main_model", "compatible_models")
+    else:
+        combos = UniversalCombo.objects.all()
+        values = ("main_model", "compatible_models", "brand__slug", "category__slug")
+    combos = (await asearch(combos, q)).values(*values)
+    rows = [row async for row in combos[: limit + 1]]
+    payload = {"q": q, "items": rows[:limit], "more": len(rows) > limit}
+    if combos.db == DEFAULT_DB_ALIAS:  # replica reads may lag; don't share them
+        await cache.aset(key, payload, SEARCH_RESULTS_TTL)
+    return payload
+
+
+def get_combo_list(slug, q=""):
     ctx = common_context("combo list")
-    # Join brand/category to prevent N+1 in templates
-    ctx["combo_list"] = (
-        UniversalCombo.objects.select_related("brand", "category")
-        .filter(brand__slug__iexact=slug.lower())
-        .only(
-            "main_model",
-            "compatible_models",
-            "slug",
-            "description",
-            "active",
-            "created_at",
-            "updated_at",
-            "brand__name",
-            "brand__slug",
-            "category__name",
-            "category__slug",
-        )
-    )
+    combos = search(combos_for("brand", Brand, slug), q)
+    # Plain dicts of just what the cards render; {% inline_for %} turns
+    # them into markup without building thousands of model instances
+    ctx["combo_list"] = combos.values("main_model", "compatible_models")
     ctx["slug"] = slug
+    ctx["q"] = q
     return ctx
 
 
-def get_category_list(slug):
+def get_category_list(slug, q=""):
     ctx = common_context("home")
-    ctx["cate_list"] = (
-        UniversalCombo.objects.select_related("brand", "category")
-        .filter(category__slug__iexact=slug.lower())
-        .only(
-            "main_model",
-            "compatible_models",
-            "slug",
-            "description",
-            "active",
-            "created_at",
-            "updated_at",
-            "brand__name",
-            "brand__slug",
-            "category__name",
-            "category__slug",
-        )
-    )
+    combos = search(combos_for("category", Category, slug), q)
+    # Plain dicts of just what the cards render; {% inline_for %} turns
+    # them into markup without building thousands of model instances
+    ctx["cate_list"] = combos.values("main_model", "compatible_models")
     ctx["slug"] = slug
+    ctx["q"] = q
     return ctx
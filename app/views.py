@@ -3,9 +3,10 @@ from __future__ import annotations
 import logging
 from typing import Dict, Any
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.http import HttpRequest, HttpResponse
+from django.db import connections, transaction
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
 from django.urls import reverse, NoReverseMatch
 from django.views.decorators.http import require_http_methods
@@ -20,11 +21,19 @@ from .utils import (
     get_term_context,
     get_combo_list,
     get_category_list,
+    search_combos,
 )
+from . import dbmetrics
+from .models import Brand, Category
+from .images import RESIZE_FORMATS, check_resize_request, get_resized
 from member.decorators import membership_required  # keep if you plan to enforce
+from core.routers import read_replica
 
 logger = logging.getLogger(__name__)
 
+SEARCH_API_LIMIT = 50
+SEARCH_API_MAX_LIMIT = 200
+
 
 # --------- helpers ---------
 def _safe_reverse(fallback_path: str, name: str) -> str:
@@ -46,6 +55,15 @@ def _client_ip(req: HttpRequest) -> str:
     return req.META.get("REMOTE_ADDR", "")
 
 
+def _search_params(req: HttpRequest) -> tuple[str, int]:
+    q = req.GET.get("q", "").strip()[:100]
+    try:
+        limit = int(req.GET.get("limit", SEARCH_API_LIMIT))
+    except ValueError:
+        limit = SEARCH_API_LIMIT
+    return q, min(max(limit, 1), SEARCH_API_MAX_LIMIT)
+
+
 # --------- pages ---------
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
@@ -57,6 +75,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@read_replica
 @require_http_methods(["GET", "POST"])
 def home_view(request: HttpRequest) -> HttpResponse:
     try:
@@ -93,6 +112,7 @@ def home_view(request: HttpRequest) -> HttpResponse:
     return render(request, "app/index.html", ctx)
 
 
+@read_replica
 @require_http_methods(["GET"])
 def about_view(request: HttpRequest) -> HttpResponse:
     try:
@@ -142,12 +162,13 @@ def contact_view(request: HttpRequest) -> HttpResponse:
     return render(request, "app/contact.html", ctx)
 
 
+@read_replica
 @login_required(login_url="accounts:login")
 # @membership_required  
 @require_http_methods(["GET"])
 def combo_list_view(request: HttpRequest, slug: str) -> HttpResponse:
     try:
-        ctx = get_combo_list(slug)
+        ctx = get_combo_list(slug, request.GET.get("q", "").strip()[:100])
     except Exception as e:
         logger.exception("combo_list_view context error for slug=%s: %s", slug, e)
         messages.error(request, "⚠️ Unable to load combos right now.")
@@ -155,12 +176,13 @@ def combo_list_view(request: HttpRequest, slug: str) -> HttpResponse:
     return render(request, "app/combo-list.html", ctx)
 
 
+@read_replica
 @login_required(login_url="accounts:login")
 # @membership_required  
 @require_http_methods(["GET"])
 def cate_list_view(request: HttpRequest, slug: str) -> HttpResponse:
     try:
-        ctx = get_category_list(slug)
+        ctx = get_category_list(slug, request.GET.get("q", "").strip()[:100])
     except Exception as e:
         logger.exception("cate_list_view context error for slug=%s: %s", slug, e)
         messages.error(request, "⚠️ Unable to load categories right now.")
@@ -168,6 +190,50 @@ def cate_list_view(request: HttpRequest, slug: str) -> HttpResponse:
     return render(request, "app/cate-list.html", ctx)
 
 
+# --------- async search API (see core/asgi.py) ---------
+@read_replica
+@login_required(login_url="accounts:login")
+@require_http_methods(["GET"])
+async def combo_search_api(request: HttpRequest, slug: str) -> JsonResponse:
+    """JSON twin of combo_list_view: a brand's combos, narrowed by ?q=."""
+    q, limit = _search_params(request)
+    try:
+        payload = await search_combos(q, "brand", Brand, slug, limit)
+    except Exception:
+        logger.exception("combo_search_api error for slug=%s", slug)
+        return JsonResponse({"error": "Unable to load combos"}, status=500)
+    return JsonResponse(payload)
+
+
+@read_replica
+@login_required(login_url="accounts:login")
+@require_http_methods(["GET"])
+async def cate_search_api(request: HttpRequest, slug: str) -> JsonResponse:
+    """JSON twin of cate_list_view: a category's combos, narrowed by ?q=."""
+    q, limit = _search_params(request)
+    try:
+        payload = await search_combos(q, "category", Category, slug, limit)
+    except Exception:
+        logger.exception("cate_search_api error for slug=%s", slug)
+        return JsonResponse({"error": "Unable to load combos"}, status=500)
+    return JsonResponse(payload)
+
+
+@read_replica
+@login_required(login_url="accounts:login")
+@require_http_methods(["GET"])
+async def combo_lookup_api(request: HttpRequest) -> JsonResponse:
+    """Which combos fit a model (?q=), across all brands and categories."""
+    q, limit = _search_params(request)
+    try:
+        payload = await search_combos(q, limit=limit)
+    except Exception:
+        logger.exception("combo_lookup_api error for q=%s", q)
+        return JsonResponse({"error": "Unable to look up combos"}, status=500)
+    return JsonResponse(payload)
+
+
+@read_replica
 @require_http_methods(["GET"])
 def privacy_policy(request: HttpRequest) -> HttpResponse:
     try:
@@ -178,6 +244,7 @@ def privacy_policy(request: HttpRequest) -> HttpResponse:
     return render(request, "app/privacy_policy.html", ctx)
 
 
+@read_replica
 @require_http_methods(["GET"])
 def terms_and_conditions(request: HttpRequest) -> HttpResponse:
     try:
@@ -188,6 +255,7 @@ def terms_and_conditions(request: HttpRequest) -> HttpResponse:
     return render(request, "app/terms_and_conditions.html", ctx)
 
 
+@read_replica
 @require_http_methods(["GET", "POST"])
 def faq_view(request: HttpRequest) -> HttpResponse:
     try:
@@ -222,6 +290,44 @@ def faq_view(request: HttpRequest) -> HttpResponse:
     return render(request, "app/faq.html", ctx)
 
 
+@require_http_methods(["GET", "HEAD"])
+def resized_image(request: HttpRequest, sig: str, width: int, fmt: str, quality: int, name: str) -> HttpResponse:
+    """Serve a MEDIA_ROOT image resized on first hit; only signed URLs are accepted."""
+    if not check_resize_request(sig, name, width, fmt, quality):
+        raise Http404("Invalid image URL")
+    try:
+        path = get_resized(name, width, fmt, quality)
+    except Exception as e:
+        logger.exception("resized_image error for %s: %s", name, e)
+        raise Http404("Image unavailable")
+    if not path:
+        raise Http404("Image not found")
+
+    response = FileResponse(open(path, "rb"), content_type=RESIZE_FORMATS[fmt][1])
+    # The signature pins every parameter, so the bytes behind this URL never change
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def db_connection_metrics(request: HttpRequest) -> JsonResponse:
+    """Connection reuse counters (app/dbmetrics.py) for sizing CONN_MAX_AGE."""
+    return JsonResponse(
+        {
+            "settings": {
+                conn.alias: {
+                    "CONN_MAX_AGE": conn.settings_dict["CONN_MAX_AGE"],
+                    "CONN_HEALTH_CHECKS": conn.settings_dict["CONN_HEALTH_CHECKS"],
+                }
+                for conn in connections.all()
+            },
+            "totals": dbmetrics.totals(),
+            "process": dbmetrics.process_totals(),
+        }
+    )
+
+
 def Handler404View(request, exception):  
     return render(request, "errors/404.html", status=404)
 
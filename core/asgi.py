@@ -5,6 +5,33 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Deployment profile
+------------------
+WSGI (core/wsgi.py) stays the default. Serve this module instead when many
+clients are slow, e.g. logged-in mobile users hitting the search API
+(/api/combos/, /api/combo-list/<slug>, /api/cate-list/<slug>): those views
+are async, so a client still sending its request or reading the response
+costs a coroutine, not a worker.
+
+    uvicorn core.asgi:application --host 127.0.0.1 --port 8001 \\
+        --workers 2 --backlog 2048 --timeout-keep-alive 5 --proxy-headers
+
+- Workers: one per CPU core; each handles thousands of open connections.
+- Database: DB_CONN_MAX_AGE defaults to 0 here (set below). Under ASGI each
+  request's ORM work runs in its own thread, so connections can't be kept
+  between requests the way WSGI workers keep them; a kept one would leak.
+- Middleware: ours (compression, preload, replica routing) run natively in
+  async mode. WhiteNoise and TemplateTimingMiddleware are sync, so Django
+  runs the chain below them in a per-request thread while the view itself
+  awaits; static files are best served by the proxy from STATIC_ROOT.
+- Sync views (the HTML pages, admin, payments) still work unchanged; Django
+  runs each in a thread.
+
+`manage.py bench_slow_clients` compares a WSGI and an ASGI server under many
+slow concurrent clients. The search APIs need a login: pass a logged-in
+session, e.g. `--cookie sessionid=<value from the browser>`, or every
+request is a redirect to the login page.
 """
 
 import os
@@ -12,5 +39,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
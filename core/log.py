@@ -0,0 +1,208 @@
+"""
+Logging that never blocks a request on disk I/O (settings.LOGGING).
+
+Records are tagged with the current request id (set by
+app.middleware.RequestIdMiddleware), sampled if they are INFO or below,
+and put on an in-memory queue. A listener thread formats them as JSON lines
+and writes them to a file the processes of a service share and rotate
+together. If the queue is full the record is
+dropped and counted; the request doesn't wait. Warnings and errors also go
+to stderr, so they still reach the host's error log.
+"""
+import atexit
+import contextvars
+import copy
+import fcntl
+import json
+import logging
+import os
+import queue
+import random
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def begin(request_id):
+    return _request_id.set(request_id)
+
+
+def end(token):
+    _request_id.reset(token)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps `rate` (0–1) of the records at INFO and below; warnings and errors
+    always pass. The decision is made per request id, so a sampled request
+    keeps all of its lines.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno > logging.INFO:
+            return True
+        request_id = getattr(record, "request_id", None) or _request_id.get()
+        if request_id:
+            return zlib.crc32(request_id.encode()) / 0xFFFFFFFF < self.rate
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_formatter = JsonFormatter()
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler for a file that several processes append to. Each
+    process reopens the file once another one has rotated it (like
+    WatchedFileHandler), and rotation runs under a lock file that is
+    re-checked, so one process rotates and the others follow instead of
+    each rolling the fresh file over again.
+    """
+
+    _file_id = None
+
+    def _open(self):
+        stream = super()._open()
+        st = os.fstat(stream.fileno())
+        self._file_id = (st.st_dev, st.st_ino)
+        return stream
+
+    def _rotated(self):
+        try:
+            st = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        return (st.st_dev, st.st_ino) != self._file_id
+
+    def _reopen_if_rotated(self):
+        if self.stream is not None and self._rotated():
+            self.stream.close()
+            self.stream = None  # emit() opens the current file
+
+    def shouldRollover(self, record):
+        self._reopen_if_rotated()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        with open(self.baseFilename + ".lock", "a") as lockf:
+            fcntl.flock(lockf, fcntl.LOCK_EX)
+            try:
+                # another process may have rotated while we waited
+                self._reopen_if_rotated()
+                if self.stream is None:
+                    return
+                super().doRollover()
+            finally:
+                fcntl.flock(lockf, fcntl.LOCK_UN)
+
+
+class QueuedJsonFileHandler(QueueHandler):
+    """
+    QueueHandler with its own listener thread writing JSON lines to a
+    SharedRotatingFileHandler. One file per service (settings.LOG_FILE),
+    shared by the processes of the service and kept to about
+    (backup_count + 1) × max_bytes. A line written just as another process
+    rotates can land in the newest backup; the oldest backup is deleted at
+    each rotation.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.filename = os.fspath(filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self.closed = False
+        self._start()
+        atexit.register(self._stop)
+        # a listener thread doesn't survive fork (e.g. gunicorn --preload);
+        # the hook can't be unregistered, hence the closed check
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start(self):
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        target = SharedRotatingFileHandler(
+            self.filename,
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        target.setFormatter(_formatter)
+        self.listener = QueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+
+    def _after_fork(self):
+        if not self.closed:
+            self._start()
+
+    def _stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()  # writes what's still queued
+            for handler in self.listener.handlers:
+                if self.dropped:
+                    handler.handle(
+                        logging.makeLogRecord(
+                            {"name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                             "msg": f"{self.dropped} log records dropped: the queue was full"}
+                        )
+                    )
+                handler.close()
+
+    def prepare(self, record):
+        # Resolve the message and traceback before queueing: args may be
+        # mutable objects and exc_info holds the whole stack. (The stock
+        # prepare() folds the traceback into the message text instead.)
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self.closed = True
+        self._stop()
+        super().close()
@@ -0,0 +1,83 @@
+"""
+Read-replica routing (settings.REPLICA_DATABASE).
+
+Only views marked @read_replica read from the replica, and only on GET/HEAD,
+only for catalogue/content models (REPLICA_APPS), and never inside a
+transaction. Everything else — writes, sessions, auth, accounts, payments,
+management commands — uses "default".
+
+Read-your-writes: any write during a request pins the rest of that request
+to the primary, and app.middleware.ReplicaRoutingMiddleware sets a short
+cookie so the same browser keeps reading from the primary for
+REPLICA_PIN_SECONDS (long enough to cover replication lag and the redirect
+after a POST).
+
+Anything cached across requests (slug maps, max price, image derivative
+info) is read from the primary with using(DEFAULT_DB_ALIAS): the pin
+only covers the writer's browser, and a stale replica read would
+otherwise be served to everyone until the cache expires.
+"""
+import contextvars
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "db_pin"
+REPLICA_APPS = {"app", "shop"}
+
+_state = contextvars.ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self):
+        self.replica = False  # set per view by the middleware
+        self.wrote = False
+
+
+def read_replica(view):
+    """Let GET/HEAD requests to this view read catalogue/content models from the replica."""
+    view.read_replica = True
+    return view
+
+
+def begin():
+    state = RoutingState()
+    return state, _state.set(state)
+
+
+def end(token):
+    _state.reset(token)
+
+
+def current():
+    return _state.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = getattr(settings, "REPLICA_DATABASE", None)
+        state = _state.get()
+        if (
+            replica
+            and state is not None
+            and state.replica
+            and not state.wrote
+            and model._meta.app_label in REPLICA_APPS
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # the replica holds the same rows as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -53,13 +53,23 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    # first, so every log record of the request carries its id
+    "app.middleware.RequestIdMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Outermost of our own: compresses the final body (after Link headers etc.)
+    "app.middleware.CompressionMiddleware",
+    "app.middleware.PreloadMiddleware",
+    # outside sessions/auth so their writes (login, session save) pin to the primary
+    "app.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # needs request.user; a no-op unless TEMPLATE_TIMING is set
+    "app.middleware.TemplateTimingMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -100,6 +110,12 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD"),
         "HOST": config("DB_HOST"),
         "PORT": config("DB_PORT"),
+        # Keep connections open between requests instead of paying TCP + auth +
+        # init_command on every one; keep below the server's wait_timeout.
+        # Health checks replace a connection the server has dropped.
+        # Reuse counters: /metrics/db-connections/ (staff only)
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", cast=int, default=60),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", cast=bool, default=True),
         "OPTIONS": {
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
             "charset": "utf8mb4",
@@ -107,6 +123,35 @@ DATABASES = {
     }
 }
 
+# Optional read replica for the catalogue/content pages (core.routers).
+# Without DB_REPLICA_HOST everything reads from "default".
+if config("DB_REPLICA_HOST", default=""):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": config("DB_REPLICA_HOST"),
+        "PORT": config("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+        "USER": config("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+        "PASSWORD": config("DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]),
+        "TEST": {"MIRROR": "default"},
+    }
+REPLICA_DATABASE = "replica" if "replica" in DATABASES else None
+# after a write, the same browser reads from the primary for this long
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", cast=int, default=10)
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+
+
+# Cache
+# Locks and reusable payloads (e.g. member checkout) must be visible to every
+# worker, so point this at a shared backend (database/redis/memcached) in production.
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="folderfix"),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -143,13 +188,76 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 # static
+# Sources live in ./static; collectstatic writes hashed + gzip/brotli copies to ./staticfiles
 STATIC_URL = "/static/"
-STATIC_ROOT = os.path.join(BASE_DIR ,"static")
+STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
+STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        # content-hashed names → WhiteNoise serves them with immutable, 1-year caching
+        "BACKEND": "core.storage.StaticStorage",
+    },
+}
 
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR,'media')
 
+# On-demand resized images (app.images.get_resized), LRU-trimmed to this size
+IMAGE_RESIZE_CACHE_DIR = config("IMAGE_RESIZE_CACHE_DIR", default=os.path.join(BASE_DIR, "media_cache"))
+IMAGE_RESIZE_CACHE_MAX_BYTES = config("IMAGE_RESIZE_CACHE_MAX_BYTES", cast=int, default=512 * 1024 * 1024)
+
+# Template render timing (app.middleware.TemplateTimingMiddleware):
+# "off", "staff" (staff requests with ?_profile=1 only) or "all"
+TEMPLATE_TIMING = config("TEMPLATE_TIMING", default="off")
+TEMPLATE_PROFILE_DIR = config("TEMPLATE_PROFILE_DIR", default=os.path.join(BASE_DIR, "profiles"))
+
+# Logging (core.log): records go on a queue and a listener thread writes
+# them as JSON lines to LOG_FILE, rotated at LOG_MAX_BYTES with 5 backups.
+# Give each service its own file (e.g. LOG_FILE=logs/cron.log in the
+# crontab environment); the processes of one service share it, and only
+# one of them rotates it when it fills (core.log.SharedRotatingFileHandler).
+# Warnings and errors also go to stderr. Every record carries the request id
+# (X-Request-ID). LOG_INFO_SAMPLE_RATE keeps that share of requests' INFO
+# lines (e.g. 0.1); warnings and errors are always kept.
+LOG_DIR = config("LOG_DIR", default=os.path.join(BASE_DIR, "logs"))
+LOG_FILE = config("LOG_FILE", default=os.path.join(LOG_DIR, "app.log"))
+LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+LOG_INFO_SAMPLE_RATE = config("LOG_INFO_SAMPLE_RATE", cast=float, default=1.0)
+LOG_MAX_BYTES = config("LOG_MAX_BYTES", cast=int, default=10 * 1024 * 1024)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "core.log.RequestIdFilter"},
+        "sample_info": {"()": "core.log.SamplingFilter", "rate": LOG_INFO_SAMPLE_RATE},
+    },
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"},
+    },
+    "handlers": {
+        "queue": {
+            "class": "core.log.QueuedJsonFileHandler",
+            "filename": LOG_FILE,
+            "max_bytes": LOG_MAX_BYTES,
+            "backup_count": 5,
+            "filters": ["request_id", "sample_info"],
+        },
+        "stderr": {
+            "class": "logging.StreamHandler",
+            "level": "WARNING",
+            "formatter": "plain",
+            "filters": ["request_id"],
+        },
+    },
+    "root": {"handlers": ["queue", "stderr"], "level": LOG_LEVEL},
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -193,6 +301,11 @@ MESSAGE_TAGS = {
 RAZORPAY_KEY_ID = config("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = config("RAZORPAY_KEY_SECRET")
 RAZORPAY_WEBHOOK_SECRET = config("RAZORPAY_WEBHOOK_SECRET")
+RAZORPAY_BASE_URL = config("RAZORPAY_BASE_URL", default="https://api.razorpay.com")
+RAZORPAY_CONNECT_TIMEOUT = config("RAZORPAY_CONNECT_TIMEOUT", cast=float, default=3.05)
+RAZORPAY_READ_TIMEOUT = config("RAZORPAY_READ_TIMEOUT", cast=float, default=10)
+RAZORPAY_POOL_SIZE = config("RAZORPAY_POOL_SIZE", cast=int, default=10)
+RAZORPAY_MAX_RETRIES = config("RAZORPAY_MAX_RETRIES", cast=int, default=2)
 
 
 
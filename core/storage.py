@@ -0,0 +1,33 @@
+import logging
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Hashed + gzip/brotli static files that tolerate references to missing files
+    (e.g. the og image, or a vendor .map) instead of failing the page or collectstatic.
+
+    A missing name is remembered for the life of the process, so it is looked
+    up and warned about once rather than on every render; like the manifest,
+    files added later are picked up on restart.
+    """
+
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._missing = set()
+
+    def hashed_name(self, name, content=None, filename=None):
+        if content is None and name in self._missing:
+            return name
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            logger.warning("Static file %s not found; serving it unhashed", name)
+            self._missing.add(name)
+            return name
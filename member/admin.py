@@ -1,6 +1,6 @@
 
 from django.contrib import admin
-from .models import Membership, Payment
+from .models import Membership, Payment, WebhookEvent
 
 @admin.register(Membership)
 class MembershipAdmin(admin.ModelAdmin):
@@ -13,3 +13,10 @@ class PaymentAdmin(admin.ModelAdmin):
     list_display = ("user", "order_id", "status", "amount", "created_at")
     list_filter = ("status",)
     search_fields = ("order_id", "payment_id", "user__username", "user__email")
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("event_id", "event", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("status", "event")
+    search_fields = ("event_id",)
+    readonly_fields = ("received_at", "processed_at")
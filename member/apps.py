@@ -15,4 +15,5 @@ class MemberConfig(AppConfig):
         def ensure_membership(sender, instance, created, **kwargs):
             if created:
                 Membership.objects.get_or_create(user=instance)
-        post_save.connect(ensure_membership, sender=User)
+        # weak=False: nothing else references this nested function once ready() returns
+        post_save.connect(ensure_membership, sender=User, weak=False)
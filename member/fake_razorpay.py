@@ -0,0 +1,152 @@
+"""
+Minimal in-process stand-in for the Razorpay REST API (orders & payments).
+
+Used by the member tests and handy for local runs:
+
+    with FakeRazorpay() as fake:
+        settings.RAZORPAY_BASE_URL = fake.url
+"""
+import json
+import itertools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        self.server.fake.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method):
+        fake = self.server.fake
+        url = urlparse(self.path)
+        fake.requests.append((method, url.path))
+        if fake.delay:
+            time.sleep(fake.delay)
+        if fake.fail_next:
+            self._send(fake.fail_next.pop(0), {"error": {"code": "SERVER_ERROR", "description": "fake failure"}})
+            return
+        status, data = fake.route(method, url.path, parse_qs(url.query), self._body())
+        self._send(status, data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # clients that time out on purpose drop the socket mid-reply
+
+
+class FakeRazorpay:
+    def __init__(self):
+        self.orders = {}
+        self.payments = {}
+        self.requests = []
+        self.connections = 0
+        self.fail_next = []  # status codes to return for the next N requests
+        self.delay = 0
+        self._ids = itertools.count(1)
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ---- seeding helpers ----
+
+    def add_order(self, order_id=None, amount=2500, created_at=None, **extra):
+        order_id = order_id or f"order_fake{next(self._ids)}"
+        self.orders[order_id] = {
+            "id": order_id,
+            "entity": "order",
+            "amount": amount,
+            "currency": "INR",
+            "status": "created",
+            "created_at": int(created_at if created_at is not None else time.time()),
+            **extra,
+        }
+        return self.orders[order_id]
+
+    def add_payment(self, order_id, status="captured", payment_id=None, created_at=None):
+        payment_id = payment_id or f"pay_fake{next(self._ids)}"
+        order = self.orders.get(order_id, {})
+        self.payments[payment_id] = {
+            "id": payment_id,
+            "entity": "payment",
+            "order_id": order_id,
+            "amount": order.get("amount", 2500),
+            "status": status,
+            "created_at": int(created_at if created_at is not None else time.time()),
+        }
+        if status == "captured" and order:
+            order["status"] = "paid"
+        return self.payments[payment_id]
+
+    # ---- routing ----
+
+    def route(self, method, path, query, body):
+        if method == "POST" and path == "/v1/orders":
+            order = self.add_order(amount=body.get("amount", 0), receipt=body.get("receipt"), notes=body.get("notes") or {})
+            return 200, order
+        if method == "GET" and path == "/v1/orders":
+            return 200, self._collection(self.orders.values(), query)
+        if method == "GET" and path == "/v1/payments":
+            return 200, self._collection(self.payments.values(), query)
+        if method == "GET" and path.startswith("/v1/orders/"):
+            order = self.orders.get(path.rsplit("/", 1)[-1])
+            if order:
+                return 200, order
+        return 404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "not found"}}
+
+    @staticmethod
+    def _collection(items, query):
+        def arg(name, default):
+            return int(query.get(name, [default])[0])
+
+        start, end = arg("from", 0), arg("to", 2**62)
+        count, skip = min(arg("count", 10), 100), arg("skip", 0)
+        # Razorpay lists newest first
+        rows = sorted(
+            (i for i in items if start <= i["created_at"] <= end),
+            key=lambda i: (i["created_at"], i["id"]),
+            reverse=True,
+        )
+        page = rows[skip:skip + count]
+        return {"entity": "collection", "count": len(page), "items": page}
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from member.webhooks import process_pending
+
+class Command(BaseCommand):
+    help = "Apply stored Razorpay webhook events to payments and memberships"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new events")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds between polls when idle")
+
+    def handle(self, *args, **opts):
+        total = 0
+        while True:
+            handled = process_pending(opts["batch_size"])
+            total += handled
+            if handled:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Processed {total} webhook events"))
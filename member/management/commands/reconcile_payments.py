@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from member.models import Payment, SyncCheckpoint
+from member.razorpay_utils import get_client
+
+CHECKPOINT = "razorpay-reconcile"
+PAGE_MAX = 100  # Razorpay's maximum `count` per list call
+
+class Command(BaseCommand):
+    help = "Reconcile Payment rows stuck in 'created' against Razorpay's payment list; expire unpaid ones older than the window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=48, help="Window size ending --lag minutes ago")
+        parser.add_argument("--lag", type=int, default=5, help="Leave the newest N minutes to the webhook/checkout flow")
+        parser.add_argument("--page-size", type=int, default=PAGE_MAX)
+        parser.add_argument("--max-pages", type=int, default=0, help="Stop after N pages (0 = no limit)")
+        parser.add_argument("--resume", action="store_true", help="Continue from the saved checkpoint")
+
+    def handle(self, *args, **opts):
+        page_size = min(opts["page_size"], PAGE_MAX)
+        checkpoint, _ = SyncCheckpoint.objects.get_or_create(name=CHECKPOINT)
+
+        if opts["resume"] and checkpoint.state.get("to"):
+            state = checkpoint.state
+        else:
+            # Razorpay pages newest-first by offset; a closed window keeps offsets stable
+            until = timezone.now() - timedelta(minutes=opts["lag"])
+            state = {
+                "from": int((until - timedelta(hours=opts["hours"])).timestamp()),
+                "to": int(until.timestamp()),
+                "skip": 0,
+            }
+
+        client = get_client()
+        pages = paid = failed = expired = 0
+        while True:
+            try:
+                page = client.payment.all({
+                    "from": state["from"],
+                    "to": state["to"],
+                    "count": page_size,
+                    "skip": state["skip"],
+                })
+            except Exception as e:
+                self._save(checkpoint, state)
+                raise CommandError(f"Razorpay fetch failed at skip={state['skip']}: {e}")
+
+            items = page.get("items", [])
+            p, f = self.apply_page(items)
+            paid += p
+            failed += f
+            pages += 1
+            state["skip"] += len(items)
+
+            if len(items) < page_size:
+                # the whole window is applied: an order older than it with no
+                # payment seen is one the user walked away from
+                expired = self.expire_abandoned(datetime.fromtimestamp(state["from"], dt_timezone.utc))
+                state = {}
+                break
+            if opts["max_pages"] and pages >= opts["max_pages"]:
+                break
+            self._save(checkpoint, state)
+
+        self._save(checkpoint, state)
+        done = "done" if not state else f"paused at skip={state['skip']}"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {pages} pages, {paid} marked paid, {failed} marked failed, {expired} expired unpaid ({done})"
+        ))
+
+    @staticmethod
+    def _save(checkpoint, state):
+        checkpoint.state = state
+        checkpoint.save(update_fields=["state", "updated_at"])
+
+    def apply_page(self, items):
+        """Match one page of Razorpay payments to local orders in a single transaction."""
+        by_order = {}
+        for item in items:
+            if not item.get("order_id"):
+                continue
+            # A captured attempt wins over failed retries of the same order
+            if item.get("status") == "captured" or item["order_id"] not in by_order:
+                by_order[item["order_id"]] = item
+        if not by_order:
+            return 0, 0
+
+        paid = failed = 0
+        with transaction.atomic():
+            # "failed" too: a later page may hold the capture for an order failed earlier
+            stuck = Payment.objects.select_for_update().filter(
+                order_id__in=list(by_order), status__in=("created", "failed")
+            )
+            for p in stuck:
+                item = by_order[p.order_id]
+                extra = {"reconciled_at": timezone.now().isoformat()}
+                if item.get("status") == "captured":
+                    paid += p.mark_paid(item["id"], extra=extra)
+                elif item.get("status") == "failed":
+                    failed += p.mark_failed(item["id"], extra=extra)
+        return paid, failed
+
+    def expire_abandoned(self, before):
+        """Fail orders still 'created' from before the window; a late capture can still flip them to paid."""
+        expired = 0
+        stale = Payment.objects.filter(status="created", created_at__lt=before)
+        while ids := list(stale.values_list("id", flat=True)[:PAGE_MAX]):
+            with transaction.atomic():
+                # re-check under the lock: the webhook may have settled it meanwhile
+                for p in Payment.objects.select_for_update().filter(id__in=ids, status="created"):
+                    expired += p.mark_failed(extra={"reconciled_at": timezone.now().isoformat(), "expired": True})
+        return expired
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from member.models import Membership
+
+class Command(BaseCommand):
+    help = "Deactivate expired memberships and email reminders before expiry (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--remind-days", type=int, default=3, help="Remind members expiring within N days (0 = off)")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        now = timezone.now()
+        chunk = opts["chunk_size"]
+
+        expired = self.deactivate_expired(now, chunk, opts["dry_run"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Deactivated {expired} expired memberships"))
+
+        if opts["remind_days"] > 0:
+            sent = self.send_reminders(now, now + timedelta(days=opts["remind_days"]), chunk, opts["dry_run"])
+            self.stdout.write(self.style.SUCCESS(f"✅ Sent {sent} expiry reminders"))
+
+    def deactivate_expired(self, now, chunk, dry_run):
+        # (active, expires_at) index → each chunk is a short range scan + UPDATE by pk
+        qs = Membership.objects.filter(active=True, expires_at__lte=now)
+        if dry_run:
+            return qs.count()
+        total = 0
+        while True:
+            ids = list(qs.values_list("id", flat=True)[:chunk])
+            if not ids:
+                return total
+            # keep the predicate: a row renewed since the SELECT must stay active
+            total += qs.filter(id__in=ids).update(active=False, updated_at=now)
+
+    def send_reminders(self, now, until, chunk, dry_run):
+        qs = (
+            Membership.objects.filter(active=True, expires_at__gt=now, expires_at__lte=until)
+            .exclude(reminded_expiry=F("expires_at"))
+            .exclude(user__email="")
+            .select_related("user")
+            .only("id", "expires_at", "user__username", "user__first_name", "user__email")
+            .order_by("id")
+        )
+        if dry_run:
+            return qs.count()
+
+        connection = get_connection()
+        subject = f"{settings.SITE_NAME} - Your membership expires soon"
+        total, last_id = 0, 0
+        while True:
+            batch = list(qs.filter(id__gt=last_id)[:chunk])
+            if not batch:
+                return total
+            last_id = batch[-1].id
+
+            messages = []
+            for m in batch:
+                context = {
+                    "site_name": settings.SITE_NAME,
+                    "site_domain": settings.SITE_DOMAIN,
+                    "user": m.user,
+                    "expires_at": m.expires_at,
+                }
+                msg = EmailMultiAlternatives(
+                    subject,
+                    render_to_string("member/emails/expiry_reminder.txt", context),
+                    settings.DEFAULT_FROM_EMAIL,
+                    [m.user.email],
+                    connection=connection,
+                )
+                msg.attach_alternative(render_to_string("member/emails/expiry_reminder.html", context), "text/html")
+                messages.append(msg)
+
+            # One SMTP session per chunk instead of one per member
+            connection.send_messages(messages)
+            Membership.objects.filter(id__in=[m.id for m in batch]).update(reminded_expiry=F("expires_at"))
+            total += len(batch)
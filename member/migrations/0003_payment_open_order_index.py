@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0002_webhookevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'status', 'amount', '-created_at'], name='member_paym_user_id_2bf267_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0003_payment_open_order_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membership',
+            name='reminded_expiry',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['active', 'expires_at'], name='member_memb_active_17bb34_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0005_synccheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
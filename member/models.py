@@ -1,5 +1,6 @@
 # Create your models here.
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
@@ -9,8 +10,15 @@ class Membership(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="membership")
     active = models.BooleanField(default=False)
     expires_at = models.DateTimeField(null=True, blank=True)
+    # expires_at value the last pre-expiry reminder was sent for
+    reminded_expiry = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["active", "expires_at"]),
+        ]
+
     def is_active(self):
         return self.active and (self.expires_at is None or self.expires_at > timezone.now())
 
@@ -33,5 +41,87 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     notes = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "status", "amount", "-created_at"]),
+        ]
+
     def __str__(self):
         return f"{self.user} ₹{self.amount/100:.2f} {self.status}"
+
+    @staticmethod
+    def open_order_key(user_id, amount):
+        """Cache key for the reusable checkout payload of an open order."""
+        return f"member:open-order:{user_id}:{amount}"
+
+    def mark_paid(self, payment_id, signature="", extra=None):
+        """
+        Flip a payment to paid and extend the owner's membership.
+        Caller holds the row lock; returns False if it was already paid.
+        """
+        if self.status == "paid":
+            return False
+        self.status = "paid"
+        self.payment_id = payment_id or self.payment_id
+        self.signature = signature or self.signature
+        if extra:
+            self.notes = {**(self.notes or {}), **extra}
+        self.save(update_fields=["status", "payment_id", "signature", "notes"])
+        cache.delete(self.open_order_key(self.user_id, self.amount))
+
+        membership, _ = Membership.objects.get_or_create(user_id=self.user_id)
+        membership.extend_30_days(from_now=False)
+        return True
+
+    def mark_failed(self, payment_id="", extra=None):
+        """Only an open order can fail; a late failure never undoes a capture."""
+        if self.status != "created":
+            return False
+        self.status = "failed"
+        self.payment_id = payment_id or self.payment_id
+        if extra:
+            self.notes = {**(self.notes or {}), **extra}
+        self.save(update_fields=["status", "payment_id", "notes"])
+        cache.delete(self.open_order_key(self.user_id, self.amount))
+        return True
+
+
+class SyncCheckpoint(models.Model):
+    """Resume point for long-running sync jobs (e.g. Razorpay reconciliation)."""
+    name = models.CharField(max_length=64, unique=True)
+    state = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.updated_at:%Y-%m-%d %H:%M}"
+
+
+class WebhookEvent(models.Model):
+    """
+    Raw Razorpay webhook delivery, stored before any processing.
+    `event_id` is the idempotency key so redeliveries are no-ops.
+    """
+    STATUS = [
+        ("pending", "Pending"),
+        ("processed", "Processed"),
+        ("ignored", "Ignored"),
+        ("failed", "Failed"),
+    ]
+    event_id = models.CharField(max_length=100, unique=True)
+    event = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    retry_at = models.DateTimeField(null=True, blank=True)  # backoff after a failed attempt
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.event_id} ({self.status})"
@@ -1,6 +1,72 @@
+import threading
 from django.conf import settings
 
+_client = None
+_lock = threading.Lock()
+
+# Only retry methods that are safe to repeat; order creation (POST) is not.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    timeout = (settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT)
+
+    class TimeoutSession(requests.Session):
+        # razorpay.Client never passes a timeout, so apply ours by default
+        def request(self, *args, **kwargs):
+            kwargs.setdefault("timeout", timeout)
+            return super().request(*args, **kwargs)
+
+    retries = settings.RAZORPAY_MAX_RETRIES
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.RAZORPAY_POOL_SIZE,
+        pool_block=True,
+        max_retries=Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            allowed_methods=IDEMPOTENT_METHODS,
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=0.2,
+            raise_on_status=False,
+        ),
+    )
+    session = TimeoutSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def get_client():
-    # Lazy import → no import errors during manage.py commands
-    import razorpay
-    return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+    """
+    Process-wide Razorpay client sharing one pooled keep-alive session,
+    so checkout requests reuse TLS connections instead of handshaking each time.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                # Lazy import → no import errors during manage.py commands
+                import razorpay
+                _client = razorpay.Client(
+                    session=_build_session(),
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    base_url=settings.RAZORPAY_BASE_URL,
+                )
+    return _client
+
+
+def reset_client():
+    """Drop the shared client (tests, or after credentials change)."""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
@@ -1,3 +1,330 @@
-from django.test import TestCase
+import json
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import views
+from .fake_razorpay import FakeRazorpay
+from .models import Membership, Payment, SyncCheckpoint, WebhookEvent
+from .razorpay_utils import get_client, reset_client
+from .webhooks import MAX_ATTEMPTS, process_pending, sign
+
+User = get_user_model()
+
+
+def _event(name, order_id, payment_id="pay_1"):
+    return {
+        "entity": "event",
+        "event": name,
+        "payload": {"payment": {"entity": {"id": payment_id, "order_id": order_id}}},
+    }
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET="whsec_test")
+class WebhookTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("tech", "tech@example.com", "pw")
+        self.payment = Payment.objects.create(user=self.user, amount=2500, order_id="order_1")
+
+    def post(self, data, event_id="evt_1", signature=None):
+        body = json.dumps(data).encode()
+        return self.client.post(
+            reverse("member:webhook"),
+            data=body,
+            content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=signature or sign(body, "whsec_test"),
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_bad_signature_rejected(self):
+        res = self.post(_event("payment.captured", "order_1"), signature="nope")
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_ack_stores_without_applying(self):
+        res = self.post(_event("payment.captured", "order_1"))
+        self.assertEqual(res.status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "created")
+        self.assertEqual(WebhookEvent.objects.get().status, "pending")
+
+    def test_redelivery_is_idempotent(self):
+        self.post(_event("payment.captured", "order_1"))
+        self.post(_event("payment.captured", "order_1"))
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_capture_extends_membership(self):
+        self.post(_event("payment.captured", "order_1"))
+        self.assertEqual(process_pending(), 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+        self.assertEqual(self.payment.payment_id, "pay_1")
+        self.assertTrue(Membership.objects.get(user=self.user).is_active())
+
+    def test_late_failure_does_not_undo_capture(self):
+        self.post(_event("payment.captured", "order_1"), event_id="evt_1")
+        self.post(_event("payment.failed", "order_1"), event_id="evt_2")
+        process_pending()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+        self.assertEqual(
+            list(WebhookEvent.objects.values_list("status", flat=True)),
+            ["processed", "processed"],
+        )
+
+    def test_non_string_event_name_stored(self):
+        self.assertEqual(self.post({"event": 42}).status_code, 200)
+        self.assertEqual(WebhookEvent.objects.get().event, "42")
+        self.assertEqual(self.post({"event": None}, event_id="evt_2").status_code, 200)
+
+    def test_failed_attempt_backs_off(self):
+        self.post(_event("payment.captured", "order_1"))
+        with mock.patch("member.webhooks.apply_event", side_effect=RuntimeError("db down")), self.assertLogs("member.webhooks", "ERROR"):
+            self.assertEqual(process_pending(), 1)
+            self.assertEqual(process_pending(), 0)  # not due yet
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts, event.error), ("pending", 1, "db down"))
+        self.assertGreater(event.retry_at, timezone.now() + timedelta(seconds=20))
+
+        WebhookEvent.objects.update(retry_at=timezone.now())
+        self.assertEqual(process_pending(), 1)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.retry_at), ("processed", 2, None))
+
+    def test_gives_up_after_max_attempts(self):
+        self.post(_event("payment.captured", "order_1"))
+        WebhookEvent.objects.update(attempts=MAX_ATTEMPTS - 1)
+        with mock.patch("member.webhooks.apply_event", side_effect=RuntimeError("bad")), self.assertLogs("member.webhooks", "ERROR"):
+            process_pending()
+        self.assertEqual(WebhookEvent.objects.get().status, "failed")
+
+
+class PooledClientTests(TestCase):
+    def setUp(self):
+        self.fake = FakeRazorpay().__enter__()
+        self.addCleanup(self.fake.__exit__)
+        self.enterContext(override_settings(
+            RAZORPAY_BASE_URL=self.fake.url,
+            RAZORPAY_READ_TIMEOUT=0.5,
+            RAZORPAY_MAX_RETRIES=2,
+        ))
+        reset_client()
+        self.addCleanup(reset_client)
+
+    def test_client_is_shared_and_keeps_connection_alive(self):
+        self.assertIs(get_client(), get_client())
+        get_client().order.create({"amount": 2500, "currency": "INR"})
+        get_client().order.create({"amount": 2500, "currency": "INR"})
+        self.assertEqual(len(self.fake.orders), 2)
+        self.assertEqual(self.fake.connections, 1)
+
+    def test_idempotent_get_is_retried(self):
+        order = self.fake.add_order()
+        self.fake.fail_next = [503]
+        self.assertEqual(get_client().order.fetch(order["id"])["id"], order["id"])
+
+    def test_order_create_is_not_retried(self):
+        from razorpay.errors import ServerError
+
+        self.fake.fail_next = [503]
+        with self.assertRaises(ServerError):
+            get_client().order.create({"amount": 2500, "currency": "INR"})
+        self.assertEqual(self.fake.orders, {})
+
+    def test_read_timeout(self):
+        from requests.exceptions import ConnectionError, Timeout
+
+        self.fake.delay = 1
+        with self.assertRaises((Timeout, ConnectionError)):
+            get_client().order.create({"amount": 2500, "currency": "INR"})
+
+
+class CreateOrderIdempotencyTests(TestCase):
+    def setUp(self):
+        self.fake = FakeRazorpay().__enter__()
+        self.addCleanup(self.fake.__exit__)
+        self.enterContext(override_settings(RAZORPAY_BASE_URL=self.fake.url))
+        reset_client()
+        self.addCleanup(reset_client)
+        cache.clear()
+        self.user = User.objects.create_user("tech", "tech@example.com", "pw")
+        self.client.force_login(self.user)
+        self.lock_key = f"member:create-order-lock:{self.user.id}"
+
+    def test_double_click_reuses_open_order(self):
+        first = self.client.post(reverse("member:create-order")).json()
+        second = self.client.post(reverse("member:create-order")).json()
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.fake.orders), 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_reuse_survives_cache_loss(self):
+        first = self.client.post(reverse("member:create-order")).json()
+        cache.clear()
+        second = self.client.post(reverse("member:create-order")).json()
+        self.assertEqual(first["order_id"], second["order_id"])
+        self.assertEqual(len(self.fake.orders), 1)
+
+    def test_paid_order_is_not_reused(self):
+        first = self.client.post(reverse("member:create-order")).json()
+        Payment.objects.get(order_id=first["order_id"]).mark_paid("pay_1")
+        second = self.client.post(reverse("member:create-order")).json()
+        self.assertNotEqual(first["order_id"], second["order_id"])
+        self.assertEqual(len(self.fake.orders), 2)
+
+    def test_concurrent_click_told_to_retry(self):
+        cache.add(self.lock_key, "other request", 60)
+        res = self.client.post(reverse("member:create-order"))
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res["Retry-After"], "1")
+        self.assertEqual(self.fake.orders, {})
+
+    def test_only_own_lock_released(self):
+        create = views._create_remote_order
+
+        def slow_create(request):
+            cache.set(self.lock_key, "next holder", 60)  # ours lapsed and was taken meanwhile
+            return create(request)
+
+        with mock.patch.object(views, "_create_remote_order", slow_create):
+            self.assertEqual(self.client.post(reverse("member:create-order")).status_code, 200)
+        self.assertEqual(cache.get(self.lock_key), "next holder")
+        cache.delete(self.lock_key)
+        self.client.post(reverse("member:create-order"))  # reuses the open order, then releases
+        self.assertIsNone(cache.get(self.lock_key))
+
+    def test_lock_outlives_razorpay_call(self):
+        with self.settings(RAZORPAY_CONNECT_TIMEOUT=3.05, RAZORPAY_READ_TIMEOUT=10):
+            self.assertGreater(views._order_lock_seconds(), 13.05)
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        self.fake = FakeRazorpay().__enter__()
+        self.addCleanup(self.fake.__exit__)
+        self.enterContext(override_settings(RAZORPAY_BASE_URL=self.fake.url))
+        reset_client()
+        self.addCleanup(reset_client)
+        self.user = User.objects.create_user("tech", "tech@example.com", "pw")
+
+        start = int(time.time()) - 3600
+        for i in range(250):
+            order = self.fake.add_order(created_at=start + i)
+            Payment.objects.create(user=self.user, amount=2500, order_id=order["id"], receipt=f"r{i}")
+            self.fake.add_payment(order["id"], status="captured" if i % 5 else "failed", created_at=start + i)
+
+    def test_pages_and_updates_in_bulk(self):
+        call_command("reconcile_payments", stdout=StringIO())
+        self.assertEqual(Payment.objects.filter(status="paid").count(), 200)
+        self.assertEqual(Payment.objects.filter(status="failed").count(), 50)
+        self.assertEqual(self.fake.requests.count(("GET", "/v1/payments")), 3)
+        self.assertTrue(Membership.objects.get(user=self.user).is_active())
+
+    def test_expires_orders_never_paid(self):
+        old = Payment.objects.create(user=self.user, amount=2500, order_id="order_closed_tab", receipt="old")
+        Payment.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(hours=49))
+        recent = Payment.objects.create(user=self.user, amount=2500, order_id="order_in_window", receipt="new")
+
+        out = StringIO()
+        call_command("reconcile_payments", stdout=out)
+        self.assertIn("1 expired unpaid", out.getvalue())
+        old.refresh_from_db()
+        self.assertEqual(old.status, "failed")
+        self.assertTrue(old.notes["expired"])
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, "created")
+
+        # a capture that turns up later still wins
+        self.assertTrue(old.mark_paid("pay_late"))
+
+    def test_resumes_from_checkpoint(self):
+        call_command("reconcile_payments", "--max-pages=1", stdout=StringIO())
+        self.assertEqual(Payment.objects.exclude(status="created").count(), 100)
+        self.assertEqual(SyncCheckpoint.objects.get().state["skip"], 100)
+
+        call_command("reconcile_payments", "--resume", stdout=StringIO())
+        self.assertFalse(Payment.objects.filter(status="created").exists())
+        self.assertEqual(SyncCheckpoint.objects.get().state, {})
+        self.assertEqual(self.fake.requests.count(("GET", "/v1/payments")), 3)
+
+
+class SweepMembershipsTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.members = {}
+        for name, active, expires, email in [
+            ("expired", True, now - timedelta(hours=1), "a@example.com"),
+            ("soon", True, now + timedelta(days=1), "b@example.com"),
+            ("soon_no_email", True, now + timedelta(days=2), ""),
+            ("later", True, now + timedelta(days=10), "c@example.com"),
+            ("lifetime", True, None, "d@example.com"),
+            ("lapsed", False, now + timedelta(days=1), "e@example.com"),
+        ]:
+            user = User.objects.create(username=name, email=email)
+            self.members[name], _ = Membership.objects.update_or_create(
+                user=user, defaults={"active": active, "expires_at": expires}
+            )
+
+    def sweep(self, *args):
+        out = StringIO()
+        call_command("sweep_memberships", "--chunk-size", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def active(self):
+        return set(Membership.objects.filter(active=True).values_list("user__username", flat=True))
+
+    def test_new_user_gets_membership(self):
+        self.assertFalse(User.objects.create(username="new").membership.active)
+
+    def test_expired_deactivated(self):
+        self.sweep("--remind-days", "0")
+        self.assertEqual(self.active(), {"soon", "soon_no_email", "later", "lifetime"})
+        self.assertEqual(mail.outbox, [])
+
+    def test_renewed_between_select_and_update_stays_active(self):
+        values_list = QuerySet.values_list
+
+        def renew_after_select(qs, *args, **kwargs):
+            ids = list(values_list(qs, *args, **kwargs))
+            if qs.model is Membership and ids:
+                self.members["expired"].extend_30_days()  # e.g. a webhook lands meanwhile
+            return ids
+
+        with mock.patch.object(QuerySet, "values_list", renew_after_select):
+            out = self.sweep("--remind-days", "0")
+        self.assertIn("Deactivated 0 expired", out)
+        self.assertIn("expired", self.active())
+
+    def test_reminders_sent_once_per_expiry(self):
+        out = self.sweep()
+        self.assertIn("Deactivated 1 expired", out)
+        self.assertIn("Sent 1 expiry reminders", out)
+        self.assertEqual([m.to for m in mail.outbox], [["b@example.com"]])
+
+        self.assertIn("Sent 0 expiry reminders", self.sweep())
+        self.assertEqual(len(mail.outbox), 1)
+
+        # renewed, then close to the new expiry: reminded again
+        soon = Membership.objects.get(user__username="soon")
+        soon.expires_at += timedelta(hours=12)
+        soon.save()
+        self.sweep()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_dry_run_changes_nothing(self):
+        out = self.sweep("--dry-run")
+        self.assertIn("Deactivated 1 expired", out)
+        self.assertIn("Sent 1 expiry reminders", out)
+        self.assertIn("expired", self.active())
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(Membership.objects.exclude(reminded_expiry=None).exists())
@@ -6,4 +6,5 @@ app_name = "member"
 urlpatterns = [
     path("create-order/", views.create_order, name="create-order"),
     path("verify/", views.verify_checkout_signature, name="verify"),
+    path("webhook/", views.razorpay_webhook, name="webhook"),
 ]
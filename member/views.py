@@ -1,21 +1,32 @@
 import json
 import logging
+import math
+import uuid
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.db import transaction
 from django.http import JsonResponse, HttpResponseBadRequest, HttpRequest
 from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
-from .models import Payment, Membership
+from .models import Payment
 from .razorpay_utils import get_client
+from .webhooks import store_event, verify_signature
 
 logger = logging.getLogger(__name__)
 
 PRICE_RUPEES = 25
 PRICE_PAISE = PRICE_RUPEES * 100
 
+# A still-open order is handed back instead of creating another one
+ORDER_REUSE_WINDOW = timedelta(minutes=15)
+ORDER_LOCK_MARGIN_SECONDS = 5
+ORDER_RETRY_AFTER_SECONDS = 1
+
 
 def _client_ip(req: HttpRequest) -> str:
     """Get the real client IP (works behind proxies)."""
@@ -25,14 +36,85 @@ def _client_ip(req: HttpRequest) -> str:
     return req.META.get("REMOTE_ADDR", "")
 
 
+def _order_payload(order_id: str) -> dict:
+    return {
+        "order_id": order_id,
+        "amount": PRICE_PAISE,
+        "currency": "INR",
+        "razorpay_key_id": settings.RAZORPAY_KEY_ID,
+    }
+
+
+def _order_lock_seconds() -> int:
+    # Outlive the slowest order.create (connect + read timeout; POSTs aren't
+    # retried), so the lock can't lapse while a request is still waiting on Razorpay
+    return math.ceil(settings.RAZORPAY_CONNECT_TIMEOUT + settings.RAZORPAY_READ_TIMEOUT) + ORDER_LOCK_MARGIN_SECONDS
+
+
+def _open_order_payload(user_id: int):
+    """Cached payload of a recent unpaid order, falling back to the DB."""
+    key = Payment.open_order_key(user_id, PRICE_PAISE)
+    payload = cache.get(key)
+    if payload:
+        return payload
+
+    p = (
+        Payment.objects.filter(
+            user_id=user_id,
+            status="created",
+            amount=PRICE_PAISE,
+            created_at__gte=timezone.now() - ORDER_REUSE_WINDOW,
+        )
+        .only("order_id", "created_at")
+        .order_by("-created_at")
+        .first()
+    )
+    if not p:
+        return None
+    payload = _order_payload(p.order_id)
+    remaining = ORDER_REUSE_WINDOW - (timezone.now() - p.created_at)
+    cache.set(key, payload, max(1, int(remaining.total_seconds())))
+    return payload
+
+
 @login_required
 @require_http_methods(["POST"])
 def create_order(request):
     """
     Create a Razorpay order for ₹25 and return order info to frontend.
+    Repeat clicks within ORDER_REUSE_WINDOW get the same open order back.
     """
+    user_id = request.user.id
+    payload = _open_order_payload(user_id)
+    if payload:
+        return JsonResponse(payload)
+
+    # Serialize concurrent clicks: one request talks to Razorpay. The others
+    # are told to retry shortly (and then get its order) instead of holding a
+    # worker while they wait.
+    lock_key = f"member:create-order-lock:{user_id}"
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, _order_lock_seconds()):
+        response = JsonResponse({"error": "Order already in progress"}, status=409)
+        response["Retry-After"] = str(ORDER_RETRY_AFTER_SECONDS)
+        return response
+
+    try:
+        payload = _open_order_payload(user_id)
+        if payload:
+            return JsonResponse(payload)
+        return _create_remote_order(request)
+    finally:
+        # Release only our own lock; if it lapsed, another request may hold it now.
+        # (get + delete isn't atomic, but the lock TTL outlives the call above.)
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _create_remote_order(request):
     client = get_client()
-    receipt = f"mem-{request.user.id}-{int(timezone.now().timestamp())}"
+    # Razorpay caps receipts at 40 chars; a timestamp alone collides on fast re-orders
+    receipt = f"mem-{request.user.id}-{uuid.uuid4().hex[:16]}"
 
     try:
         order = client.order.create({
@@ -59,12 +141,13 @@ def create_order(request):
         status="created",
     )
 
-    return JsonResponse({
-        "order_id": order["id"],
-        "amount": PRICE_PAISE,
-        "currency": "INR",
-        "razorpay_key_id": settings.RAZORPAY_KEY_ID,
-    })
+    payload = _order_payload(order["id"])
+    cache.set(
+        Payment.open_order_key(request.user.id, PRICE_PAISE),
+        payload,
+        int(ORDER_REUSE_WINDOW.total_seconds()),
+    )
+    return JsonResponse(payload)
 
 
 @login_required
@@ -73,7 +156,7 @@ def verify_checkout_signature(request):
     """
     Verify Razorpay payment signature (fallback for instant activation).
     """
-    from razorpay import Utility, errors
+    from razorpay import errors
 
     order_id = request.POST.get("razorpay_order_id")
     payment_id = request.POST.get("razorpay_payment_id")
@@ -83,7 +166,7 @@ def verify_checkout_signature(request):
         return HttpResponseBadRequest("Missing fields")
 
     try:
-        Utility.verify_payment_signature({
+        get_client().utility.verify_payment_signature({
             "razorpay_order_id": order_id,
             "razorpay_payment_id": payment_id,
             "razorpay_signature": signature,
@@ -94,25 +177,13 @@ def verify_checkout_signature(request):
 
     try:
         with transaction.atomic():
-            p = Payment.objects.select_for_update().select_related("user").get(order_id=order_id)
-
-            if p.status != "paid":
-                ip = _client_ip(request)
-                p.status = "paid"
-                p.payment_id = payment_id
-                p.signature = signature
-                data = request.POST.dict()
-                data["client_ip"] = ip
-                p.extra_data = data
-                p.save(update_fields=["status", "payment_id", "signature", "extra_data"])
-
-                # Ensure membership record exists and extend
-                membership, _ = Membership.objects.get_or_create(user=p.user)
-                membership.extend_30_days(from_now=False)
+            p = Payment.objects.select_for_update().get(order_id=order_id)
 
+            ip = _client_ip(request)
+            if p.mark_paid(payment_id, signature, extra={"client_ip": ip}):
                 logger.info(
                     "Membership extended for user %s via payment %s from IP %s",
-                    p.user.id, payment_id, ip
+                    p.user_id, payment_id, ip
                 )
             else:
                 logger.info("Duplicate verification attempt for order %s", order_id)
@@ -122,3 +193,25 @@ def verify_checkout_signature(request):
         return HttpResponseBadRequest("Payment not found")
 
     return JsonResponse({"ok": True})
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def razorpay_webhook(request):
+    """
+    Razorpay webhook receiver: verify, store, acknowledge.
+    Payment/Membership updates happen in `manage.py process_webhooks`.
+    """
+    body = request.body
+    if not verify_signature(body, request.headers.get("X-Razorpay-Signature", "")):
+        logger.warning("Webhook signature verification failed from IP %s", _client_ip(request))
+        return HttpResponseBadRequest("Invalid signature")
+
+    try:
+        event, created = store_event(body, request.headers.get("X-Razorpay-Event-Id", ""))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid payload")
+
+    if not created:
+        logger.info("Duplicate webhook delivery %s", event.event_id)
+    return JsonResponse({"ok": True})
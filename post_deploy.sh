@@ -2,6 +2,12 @@
 workon env
 cd /home/folderfix/folder_fix
 git pull origin main
+pip install -r requirements.txt
 python manage.py migrate
-python manage.py collectstatic --noinput
+# stored policy/terms/FAQ HTML, in case the renderer changed
+python manage.py render_rich_text
+# pruned/minified CSS and joined JS bundles into static/dist (referenced via static/dist/assets.json)
+python manage.py build_assets
+# hashed names + .gz/.br siblings into STATIC_ROOT (./staticfiles) for WhiteNoise
+python manage.py collectstatic --noinput --clear
 touch /var/www/folderfix_com_wsgi.py
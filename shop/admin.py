@@ -1,4 +1,5 @@
 from django.contrib import admin
+from app.search import search
 from .models import *
 
 @admin.register(AboutImage)
@@ -39,6 +40,10 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     readonly_fields = ("created_at", "updated_at")
 
+    def get_search_results(self, request, queryset, search_term):
+        # full-text index on name instead of icontains
+        return search(queryset, search_term, rank=False), False
+
 
 
 
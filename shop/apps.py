@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        # Product.save() clears the max price; deletes (incl. admin bulk deletes) go through here
+        from django.core.cache import cache
+        from django.db.models.signals import post_delete
+        from .models import MAX_PRICE_CACHE_KEY, Product
+
+        def clear_max_price(sender, instance, **kwargs):
+            cache.delete(MAX_PRICE_CACHE_KEY)
+        post_delete.connect(clear_max_price, sender=Product, weak=False)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-id'], name='shop_produc_categor_88ae4b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['popular', '-id'], name='shop_produc_popular_8d95cf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_available', '-id'], name='shop_produc_is_avai_489863_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price'], name='shop_produc_price_3b79b5_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# FULLTEXT index on MySQL, FTS5 table + sync triggers on SQLite (see app/search.py).
+# The SQL is spelled out here so later changes to app.search can't alter this migration.
+
+from django.db import migrations
+
+SQL = {
+    'mysql': (
+        [
+            'ALTER TABLE `shop_product` ADD FULLTEXT INDEX `shop_product_fulltext` (`name`)',
+        ],
+        [
+            'ALTER TABLE `shop_product` DROP INDEX `shop_product_fulltext`',
+        ],
+    ),
+    'sqlite': (
+        [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS shop_product_fts USING fts5(name, content='shop_product', content_rowid='id')",
+            'CREATE TRIGGER IF NOT EXISTS shop_product_fts_ai AFTER INSERT ON shop_product BEGIN INSERT INTO shop_product_fts(rowid, name) VALUES (new.id, new.name); END',
+            "CREATE TRIGGER IF NOT EXISTS shop_product_fts_ad AFTER DELETE ON shop_product BEGIN INSERT INTO shop_product_fts(shop_product_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+            "CREATE TRIGGER IF NOT EXISTS shop_product_fts_au AFTER UPDATE ON shop_product BEGIN INSERT INTO shop_product_fts(shop_product_fts, rowid, name) VALUES ('delete', old.id, old.name); INSERT INTO shop_product_fts(rowid, name) VALUES (new.id, new.name); END",
+            "INSERT INTO shop_product_fts(shop_product_fts) VALUES ('rebuild')",
+        ],
+        [
+            'DROP TRIGGER IF EXISTS shop_product_fts_ai',
+            'DROP TRIGGER IF EXISTS shop_product_fts_ad',
+            'DROP TRIGGER IF EXISTS shop_product_fts_au',
+            'DROP TABLE IF EXISTS shop_product_fts',
+        ],
+    ),
+}
+
+
+def forwards(apps, schema_editor):
+    for sql in SQL.get(schema_editor.connection.vendor, ([], []))[0]:
+        schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    for sql in SQL.get(schema_editor.connection.vendor, ([], []))[1]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0002_product_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,27 @@
+# Category slugs are stored lowercase from now on (see Category.save())
+
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    Category = apps.get_model("shop", "Category")
+    for category in Category.objects.all():
+        base = slug = category.slug.lower()
+        if slug == category.slug:
+            continue
+        n = 2
+        while Category.objects.filter(slug=slug).exclude(pk=category.pk).exists():
+            slug = f"{base}-{n}"
+            n += 1
+        Category.objects.filter(pk=category.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+from django.core.cache import cache
 from django.db import models
 
+MAX_PRICE_CACHE_KEY = "shop:max-price"  # shop.utils.get_max_price
+
 
 class IconColor(models.Model):
     """Simple reusable color model."""
@@ -42,6 +45,10 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.slug = self.slug.lower()  # ?category=<slug> filters match exactly
+        super().save(*args, **kwargs)
+
 
 
 class Product(models.Model):
@@ -62,10 +69,21 @@ class Product(models.Model):
 
     class Meta:
         ordering = ["-popular", "-updated_at"]
+        indexes = [
+            # shop filters + keyset pagination on -id
+            models.Index(fields=["category", "-id"]),
+            models.Index(fields=["popular", "-id"]),
+            models.Index(fields=["is_available", "-id"]),
+            models.Index(fields=["price"]),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(MAX_PRICE_CACHE_KEY)
+
 
 class ServiceItem(models.Model):
     """Each card in the Services grid."""
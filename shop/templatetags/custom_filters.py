@@ -1,14 +1,14 @@
 from django import template
-import re
+from app.richtext import MARK_RE
 
 register = template.Library()
 
 @register.filter
 def highlight(text):
     """
-    Replace **text** with <span class='highlight'>text</span>
+    Replace **text** with <span class='mark'>text</span>
+    (stored rich text is pre-rendered instead, see app/richtext.py)
     """
     if not text:
         return ""
-    # Regex to replace **word** with span
-    return re.sub(r'\*\*(.*?)\*\*', r"<span class='mark'>\1</span>", text)
+    return MARK_RE.sub(r"<span class='mark'>\1</span>", text)
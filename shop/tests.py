@@ -1,3 +1,86 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import MAX_PRICE_CACHE_KEY, Category, Product
+from .utils import get_max_price, get_product_page, parse_filters
+
+
+def filters(**params):
+    return parse_filters(params)
+
+
+class ProductFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.covers = Category.objects.create(name="Covers", slug="Covers")
+        cls.glass = Category.objects.create(name="Glass", slug="glass")
+        cls.products = [
+            Product.objects.create(category=cls.covers, name="Silicone case", price=Decimal("199")),
+            Product.objects.create(category=cls.covers, name="Leather case", price=Decimal("899"), popular=True),
+            Product.objects.create(category=cls.glass, name="Tempered glass", price=Decimal("99"), is_available=True),
+        ]
+
+    def names(self, **params):
+        return [p.name for p in get_product_page(filters(**params))["products"]]
+
+    def test_parse_filters(self):
+        self.assertEqual(
+            filters(q="  case ", category="ALL", min_price="1e2", max_price="abc", available="on"),
+            {"q": "case", "category": "", "min_price": Decimal("100"), "max_price": None, "available": True, "popular": False},
+        )
+        for value in ("NaN", "sNaN", "Infinity", "-inf"):
+            with self.subTest(value):
+                self.assertIsNone(filters(min_price=value)["min_price"])
+
+    def test_filters(self):
+        self.assertEqual(self.names(), ["Tempered glass", "Leather case", "Silicone case"])
+        self.assertEqual(self.names(category="covers"), ["Leather case", "Silicone case"])
+        self.assertEqual(self.names(category=str(self.glass.id)), ["Tempered glass"])
+        self.assertEqual(self.names(min_price="100", max_price="500"), ["Silicone case"])
+        self.assertEqual(self.names(available="1"), ["Tempered glass"])
+        self.assertEqual(self.names(popular="true"), ["Leather case"])
+        self.assertEqual(self.names(q="case", category="covers", popular="1"), ["Leather case"])
+
+    def test_keyset_pages(self):
+        first = get_product_page(filters(), page_size=2)
+        self.assertEqual(first["next_cursor"], self.products[1].id)
+        second = get_product_page(filters(), after=first["next_cursor"], page_size=2)
+        self.assertEqual([p.name for p in second["products"]], ["Silicone case"])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_max_price_cleared_on_save_and_delete(self):
+        cache.delete(MAX_PRICE_CACHE_KEY)
+        self.assertEqual(get_max_price(), Decimal("899"))
+        self.products[0].price = Decimal("999")
+        self.products[0].save()
+        self.assertEqual(get_max_price(), Decimal("999"))
+        Product.objects.filter(pk=self.products[0].pk).delete()
+        self.assertEqual(get_max_price(), Decimal("899"))
+
+
+@override_settings(REPLICA_DATABASE=None)
+class ProductListApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Covers", slug="covers")
+        for i in range(30):
+            Product.objects.create(category=category, name=f"Case {i}", price=Decimal(100 + i), image="products/c.jpg")
+
+    def test_pages_follow_the_cursor(self):
+        url = reverse("shop:product-list-api")
+        first = self.client.get(url, {"category": "covers"}).json()
+        self.assertEqual(len(first["items"]), 24)
+        self.assertEqual(first["items"][0]["name"], "Case 29")
+        self.assertEqual(first["items"][0]["category"], {"id": first["items"][0]["category"]["id"], "name": "Covers", "slug": "covers"})
+        self.assertTrue(first["items"][0]["image"].endswith("products/c.jpg"))
+        second = self.client.get(url, {"category": "covers", "after": first["next"]}).json()
+        self.assertEqual([p["name"] for p in second["items"]], [f"Case {i}" for i in range(5, -1, -1)])
+        self.assertIsNone(second["next"])
+
+    def test_shop_page_links_the_api(self):
+        response = self.client.get(reverse("shop:shop"), {"popular": "0"})
+        self.assertContains(response, 'id="productCardTemplate"')
+        self.assertContains(response, reverse("shop:product-list-api") + "?popular=0&amp;after=")
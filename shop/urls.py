@@ -5,5 +5,6 @@ app_name="shop"
 
 urlpatterns = [
     path("", shop_view, name="shop"),
+    path("api/products/", product_list_api, name="product-list-api"),
     # path("details/<int:pk>", details_view, name="details"),
 ]
@@ -0,0 +1,122 @@
+from decimal import Decimal, InvalidOperation
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+from app.images import get_variants, srcset
+from app.search import search
+from .models import MAX_PRICE_CACHE_KEY, Category, Product
+
+PAGE_SIZE = 24
+
+# Fields the product cards actually render
+CARD_FIELDS = (
+    "id",
+    "name",
+    "price",
+    "image",
+    "popular",
+    "is_available",
+    "whatsapp_link",
+    "call_link",
+    "category__id",
+    "category__name",
+    "category__slug",
+)
+
+
+def _decimal(value):
+    try:
+        number = Decimal(value) if value not in (None, "") else None
+    except InvalidOperation:
+        return None
+    return number if number is None or number.is_finite() else None  # NaN/Infinity
+
+
+def _flag(value):
+    return value in ("1", "true", "on", "yes")
+
+
+def parse_filters(params):
+    """Normalize shop query params (request.GET) into a filter dict."""
+    category = (params.get("category") or "").strip().lower()  # slugs are stored lowercase
+    return {
+        "q": (params.get("q") or "").strip()[:100],
+        "category": "" if category == "all" else category,
+        "min_price": _decimal(params.get("min_price")),
+        "max_price": _decimal(params.get("max_price")),
+        "available": _flag(params.get("available")),
+        "popular": _flag(params.get("popular")),
+    }
+
+
+def filtered_products(filters):
+    qs = Product.objects.select_related("category").only(*CARD_FIELDS)
+    if filters["category"]:
+        if filters["category"].isdigit():
+            qs = qs.filter(category_id=int(filters["category"]))
+        else:
+            qs = qs.filter(category__slug=filters["category"])
+    if filters["min_price"] is not None:
+        qs = qs.filter(price__gte=filters["min_price"])
+    if filters["max_price"] is not None:
+        qs = qs.filter(price__lte=filters["max_price"])
+    if filters["available"]:
+        qs = qs.filter(is_available=True)
+    if filters["popular"]:
+        qs = qs.filter(popular=True)
+    if filters["q"]:
+        # full-text words on name; pages stay in -id order for the keyset cursor
+        qs = search(qs, filters["q"], rank=False)
+    return qs
+
+
+def get_product_page(filters, after=None, page_size=PAGE_SIZE):
+    """
+    Keyset page of products, newest first. `after` is the last id of the
+    previous page, so deep pages cost the same as the first (no OFFSET).
+    """
+    qs = filtered_products(filters).order_by("-id")
+    if after:
+        qs = qs.filter(id__lt=after)
+    rows = list(qs[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return {
+        "products": rows,
+        "next_cursor": rows[-1].id if has_more else None,
+    }
+
+
+def get_max_price():
+    # Backed by the price index, and cached since it only matters for the slider
+    price = cache.get(MAX_PRICE_CACHE_KEY)
+    if price is None:
+        # from the primary, so a lagging replica's value isn't cached
+        price = Product.objects.using(DEFAULT_DB_ALIAS).aggregate(Max("price"))["price__max"] or 500  # fallback
+        cache.set(MAX_PRICE_CACHE_KEY, price, 60 * 10)
+    return price
+
+
+def product_to_dict(product):
+    info = get_variants(product.image.name) if product.image else None
+    return {
+        "id": product.id,
+        "name": product.name,
+        "price": str(product.price),
+        "image": product.image.url if product.image else "",
+        "webp_srcset": srcset(info, "webp") if info else "",
+        "jpeg_srcset": srcset(info, "jpg") if info else "",
+        "popular": product.popular,
+        "is_available": product.is_available,
+        "whatsapp_link": product.whatsapp_link or "",
+        "call_link": product.call_link or "",
+        "category": {
+            "id": product.category.id,
+            "name": product.category.name,
+            "slug": product.category.slug,
+        },
+    }
+
+
+def get_categories():
+    return Category.objects.only("id", "name", "slug").order_by("name")
@@ -1,6 +1,5 @@
 from django.shortcuts import render
 from .models import *
-from django.db.models import Max
 from app.utils import common_context
 from typing import Dict, Any
 # Create your views here.
@@ -8,19 +7,33 @@ import re
 import logging
 from django.views.decorators.cache import cache_page
 from django.views.decorators.http import require_http_methods
-from django.http import HttpRequest,HttpResponse
+from django.http import HttpRequest,HttpResponse,JsonResponse
+from core.routers import read_replica
+from .utils import (
+    parse_filters,
+    get_product_page,
+    get_max_price,
+    get_categories,
+    product_to_dict,
+)
 
 logger = logging.getLogger(__name__)
 
+
+def _cursor(request: HttpRequest):
+    after = request.GET.get("after", "")
+    return int(after) if after.isdigit() else None
+
+
+@read_replica
 @require_http_methods(["GET"])
 # @cache_page(60 * 5) 
 def shop_view(request:HttpRequest)->HttpResponse:
     try:
         ctx: Dict[str, Any]=common_context("shop")
+        filters = parse_filters(request.GET)
+        page = get_product_page(filters, after=_cursor(request))
         about = AboutSection.objects.last()
-        products = Product.objects.select_related("category").order_by("-pk").all()
-        categories_list = Category.objects.all()
-        max_price = products.aggregate(Max('price'))['price__max'] or 500  # fallback
         services= (
             ServiceItem.objects.filter(is_enabled=True)
             .only("title", "description", "icon_text", "icon_class", "color", "order", "is_enabled")
@@ -29,12 +42,19 @@ def shop_view(request:HttpRequest)->HttpResponse:
         contact_info= ContactInfo.objects.only(
             "title", "description", "icon_class", "color", "order"
         ).order_by("order")
-    
+
+        # Query string without the cursor, reused by the "load more" link
+        params = request.GET.copy()
+        params.pop("after", None)
+
         ctx.update( {
             "about": about,
-            "products": products,
-            "categories_list": categories_list,
-            "max_price": max_price,
+            "products": page["products"],
+            "next_cursor": page["next_cursor"],
+            "filters": filters,
+            "filter_query": params.urlencode(),
+            "categories_list": get_categories(),
+            "max_price": get_max_price(),
             "services":services,
             "contact_info":contact_info
         })
@@ -52,4 +72,16 @@ def shop_view(request:HttpRequest)->HttpResponse:
     return render(request, "shop/shop.html", ctx)
 
 
-
+@read_replica
+@require_http_methods(["GET"])
+def product_list_api(request: HttpRequest) -> JsonResponse:
+    """JSON twin of the shop grid: same filters, same keyset cursor."""
+    try:
+        page = get_product_page(parse_filters(request.GET), after=_cursor(request))
+    except Exception:
+        logger.exception("Error loading product list")
+        return JsonResponse({"error": "Unable to load products"}, status=500)
+    return JsonResponse({
+        "items": [product_to_dict(p) for p in page["products"]],
+        "next": page["next_cursor"],
+    })
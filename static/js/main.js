@@ -186,11 +186,18 @@ document.addEventListener("DOMContentLoaded", () => {
     e.preventDefault();
 
     try {
-      const resp = await fetch(form.action, {
-        method: "POST",
-        headers: { "X-Requested-With": "XMLHttpRequest" },
-        body: new FormData(form),
-      });
+      // 409: another click is still creating the order; retry when told to
+      let resp;
+      for (let attempt = 0; attempt < 20; attempt++) {
+        resp = await fetch(form.action, {
+          method: "POST",
+          headers: { "X-Requested-With": "XMLHttpRequest" },
+          body: new FormData(form),
+        });
+        if (resp.status !== 409) break;
+        const wait = Number(resp.headers.get("Retry-After")) || 1;
+        await new Promise((resolve) => setTimeout(resolve, wait * 1000));
+      }
 
       if (!resp.ok) throw new Error("Failed to create order");
       const data = await resp.json();